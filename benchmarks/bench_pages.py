@@ -0,0 +1,321 @@
+'''
+Headless benchmarks for the driver and team pages.
+
+Every scenario runs in its own Python process so peak memory and cold-start
+reads are measured in isolation. Inside that process the app is driven
+through Streamlit's AppTest harness: one cold run of the page, then warm
+reruns that hit the process-wide caches.
+
+    python benchmarks/bench_pages.py                    # run and compare with the baseline
+    python benchmarks/bench_pages.py --save-baseline    # store these results as the baseline
+    python benchmarks/bench_pages.py --scenario driver_2024 --repeats 5
+
+Career-length scenarios also have a fixed latency budget, checked on every run.
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+# Time-to-first-paint is measured from here, before Streamlit is imported
+PROCESS_START = time.perf_counter()
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+PAGES_DIR = os.path.join(BASE_DIR, "pages")
+APP_PATH = os.path.join(PAGES_DIR, "app.py")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# Most a career-length timeframe may take to render cold, in seconds
+CAREER_BUDGET_S = 1.5
+
+# A scenario is a page, the entity selected on it and the session state the
+# filters would set: a season or custom timeframe, and comparison entities.
+# A scenario with a budget_s fails when its cold render takes longer. With a
+# next selection (a season or comparison), the time to render it after the
+# first page is also measured; prefetch False turns background prefetch off.
+SCENARIOS = {
+    "driver_2024": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "season": 2024, "next": {"season": 2023}},
+    "driver_2021": {"page": "Driver Analysis", "entity": "Max Verstappen", "season": 2021},
+    "driver_2018": {"page": "Driver Analysis", "entity": "Sebastian Vettel", "season": 2018},
+    "driver_2025": {"page": "Driver Analysis", "entity": "Kimi Antonelli", "season": 2025},
+    "driver_2024_teammate": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "season": 2024, "next": {"compare": ["George Russell"]}},
+    "driver_2024_no_prefetch": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "season": 2024, "next": {"season": 2023}, "prefetch": False},
+    "driver_custom": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "timeframe": ("2019-01-01", "2021-12-31")},
+    "driver_compare": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "season": 2024, "compare": ["Max Verstappen"]},
+    "driver_compare_3": {"page": "Driver Analysis", "entity": "Lando Norris", "season": 2024, "compare": ["Oscar Piastri", "Charles Leclerc"]},
+    "driver_compare_custom": {"page": "Driver Analysis", "entity": "Lewis Hamilton", "timeframe": ("2018-01-01", "2024-12-31"), "compare": ["George Russell"]},
+    "team_2024": {"page": "Team Analysis", "entity": "Ferrari", "season": 2024, "next": {"season": 2023}},
+    "team_2024_no_prefetch": {"page": "Team Analysis", "entity": "Ferrari", "season": 2024, "next": {"season": 2023}, "prefetch": False},
+    "team_2019": {"page": "Team Analysis", "entity": "Red Bull", "season": 2019},
+    "team_custom": {"page": "Team Analysis", "entity": "Ferrari", "timeframe": ("2019-01-01", "2021-12-31")},
+    "team_compare": {"page": "Team Analysis", "entity": "McLaren", "season": 2024, "compare": ["Ferrari", "Red Bull"]},
+    "team_compare_custom": {"page": "Team Analysis", "entity": "Mercedes", "timeframe": ("2018-01-01", "2024-12-31"), "compare": ["Red Bull"]},
+    "driver_1951": {"page": "Driver Analysis", "entity": "Juan Fangio", "season": 1951},
+    "driver_1988": {"page": "Driver Analysis", "entity": "Ayrton Senna", "season": 1988},
+    "team_1967": {"page": "Team Analysis", "entity": "Team Lotus", "season": 1967},
+    # 20-year windows have to render within a fixed budget, whatever the baseline
+    "driver_career": {"page": "Driver Analysis", "entity": "Fernando Alonso", "timeframe": ("2001-01-01", "2021-12-31"),
+                      "compare": ["Kimi Räikkönen"], "budget_s": CAREER_BUDGET_S},
+    "team_career": {"page": "Team Analysis", "entity": "Ferrari", "timeframe": ("2004-01-01", "2024-12-31"),
+                    "compare": ["McLaren", "Williams"], "budget_s": CAREER_BUDGET_S},
+}
+
+# Slower than the baseline by more than this fraction counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+
+class ReadCounter:
+    '''
+    Counts archive reads by wrapping pandas.read_csv and the snapshot reader
+    '''
+
+    def __init__(self):
+        import pandas as pd
+        import data
+        self.csv = 0
+        self.snapshot = 0
+        read_csv, read_arrow = pd.read_csv, data.read_arrow
+
+        def counted_read_csv(*args, **kwargs):
+            self.csv += 1
+            return read_csv(*args, **kwargs)
+
+        def counted_read_arrow(*args, **kwargs):
+            self.snapshot += 1
+            return read_arrow(*args, **kwargs)
+
+        pd.read_csv = counted_read_csv
+        data.read_arrow = counted_read_arrow
+
+    def take(self):
+        counts = {"csv": self.csv, "snapshot": self.snapshot}
+        self.csv = self.snapshot = 0
+        return counts
+
+
+def apply_scenario(at, spec):
+    '''
+    Select the scenario's page and entity and put its filters in session state
+    '''
+    at.sidebar.selectbox[0].select(spec["page"]).run()
+    label = "Select a driver:" if spec["page"] == "Driver Analysis" else "Select a team:"
+    entity_box = next(box for box in at.selectbox if box.label == label)
+    if spec["entity"] not in entity_box.options:
+        return f"{spec['entity']} is not in the data"
+
+    if "timeframe" in spec:
+        start, end = (datetime.date.fromisoformat(day) for day in spec["timeframe"])
+        at.session_state["custom_timeframe"] = (start, end)
+        at.session_state["custom_timeframe_selected"] = True
+    else:
+        at.session_state["race_season"] = spec["season"]
+    if spec.get("compare"):
+        if spec["page"] == "Driver Analysis":
+            at.session_state["enable_comparison"] = True
+            at.session_state["compare_driver_names"] = spec["compare"]
+        else:
+            at.session_state["enable_team_comparison"] = True
+            at.session_state["compare_team_names"] = spec["compare"]
+    entity_box.select(spec["entity"])
+    return None
+
+
+def apply_next(at, spec):
+    '''
+    Change the filters to the scenario's next selection, as the user would
+    '''
+    following = spec["next"]
+    if "season" in following:
+        at.session_state["race_season"] = following["season"]
+    if "compare" in following:
+        if spec["page"] == "Driver Analysis":
+            at.session_state["enable_comparison"] = True
+            at.session_state["compare_driver_names"] = following["compare"]
+        else:
+            at.session_state["enable_team_comparison"] = True
+            at.session_state["compare_team_names"] = following["compare"]
+
+
+def run_scenario(name, repeats):
+    '''
+    Run one scenario in this process and return its measurements
+    '''
+    warnings.filterwarnings("ignore")
+    os.chdir(PAGES_DIR)
+    sys.path.insert(0, PAGES_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    spec = SCENARIOS[name]
+    if not spec.get("prefetch", True):
+        os.environ["PREFETCH_WORKERS"] = "0"
+    import prefetch
+    reads = ReadCounter()
+    at = AppTest.from_file(APP_PATH, default_timeout=300)
+    start = time.perf_counter()
+    at.run()
+    end = time.perf_counter()
+    startup_s = end - start
+    # Importing Streamlit and the app plus rendering the landing page
+    first_paint_s = end - PROCESS_START
+    skipped = apply_scenario(at, spec)
+    if skipped:
+        return {"scenario": name, "status": "skipped", "reason": skipped}
+
+    start = time.perf_counter()
+    at.run()
+    cold_s = time.perf_counter() - start
+    # Everything read from process start up to the first render of the page
+    cold_reads = reads.take()
+    if at.exception:
+        return {"scenario": name, "status": "error", "error": at.exception[0].message}
+    # Let the background prefetch finish, as it would while the user reads the page
+    prefetch.wait(timeout=60)
+
+    warm_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        at.run()
+        warm_times.append(time.perf_counter() - start)
+    warm_reads = reads.take()
+
+    next_s = None
+    if spec.get("next"):
+        apply_next(at, spec)
+        start = time.perf_counter()
+        at.run()
+        next_s = round(time.perf_counter() - start, 4)
+        if at.exception:
+            return {"scenario": name, "status": "error", "error": at.exception[0].message}
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "scenario": name,
+        "status": "ok",
+        "first_paint_s": round(first_paint_s, 4),
+        "startup_s": round(startup_s, 4),
+        "cold_s": round(cold_s, 4),
+        "warm_s": round(statistics.median(warm_times), 4),
+        "warm_min_s": round(min(warm_times), 4),
+        "next_s": next_s,
+        "csv_reads_cold": cold_reads["csv"],
+        "snapshot_reads_cold": cold_reads["snapshot"],
+        "csv_reads_warm": warm_reads["csv"],
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "metrics": len(at.metric),
+        "budget_s": spec.get("budget_s"),
+    }
+
+
+def run_isolated(name, repeats):
+    '''
+    Run a scenario in a fresh interpreter and parse its JSON result
+    '''
+    command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--repeats", str(repeats)]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    try:
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return {"scenario": name, "status": "error", "error": completed.stderr.strip()[-500:]}
+
+
+def compare(results, baseline, tolerance):
+    '''
+    Regressions against a baseline: slower warm or cold time beyond the
+    tolerance, more archive reads, or a scenario that stopped working
+    '''
+    previous = {result["scenario"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None or before.get("status") != "ok":
+            continue
+        if result["status"] != "ok":
+            regressions.append(f"{result['scenario']}: {result['status']} ({result.get('error', result.get('reason'))})")
+            continue
+        for key in ["first_paint_s", "startup_s", "cold_s", "warm_s", "next_s"]:
+            if before.get(key) is not None and result[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{result['scenario']}: {key} {before[key]:.3f}s -> {result[key]:.3f}s")
+        for key in ["csv_reads_cold", "csv_reads_warm"]:
+            if result[key] > before[key]:
+                regressions.append(f"{result['scenario']}: {key} {before[key]} -> {result[key]}")
+    return regressions
+
+
+def over_budget(results):
+    '''
+    Scenarios whose cold render took longer than their latency budget
+    '''
+    return [
+        f"{result['scenario']}: cold_s {result['cold_s']:.3f}s over the {result['budget_s']:.2f}s budget"
+        for result in results
+        if result["status"] == "ok" and result.get("budget_s") is not None and result["cold_s"] > result["budget_s"]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless page benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=3, help="Warm reruns per scenario")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown as a fraction")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.worker, args.repeats)))
+        return 0
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        result = run_isolated(name, args.repeats)
+        results.append(result)
+        if result["status"] == "ok":
+            print(f"{name:24} first paint {result['first_paint_s']:6.3f}s  startup {result['startup_s']:6.3f}s  cold {result['cold_s']:7.3f}s  warm {result['warm_s']:7.3f}s  "
+                  f"csv reads {result['csv_reads_cold']:3}/{result['csv_reads_warm']:<3}  peak {result['peak_rss_mb']:7.1f} MB"
+                  + (f"  next {result['next_s']:6.3f}s" if result.get("next_s") is not None else ""))
+        else:
+            print(f"{name:24} {result['status']}: {result.get('error', result.get('reason'))}")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    failures = over_budget(results)
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 1 if failures else 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against the baseline")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
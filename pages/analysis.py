@@ -0,0 +1,483 @@
+import numpy as np
+import pandas as pd
+import data
+import profiling
+
+# Data and figures behind the driver and team pages, free of Streamlit so the
+# batch reports (see report.py) can reuse them. Entities are passed in as
+# ordered {id: label} dicts; colors as {label: color}. When the races are a
+# whole season, pass it as `season` and the stats come from the summary cube
+# instead of being aggregated from the raw rows.
+
+# Most points a line series is drawn with. Longer series, from career-length
+# timeframes, are decimated so the browser is never sent thousands of markers.
+MAX_SERIES_POINTS = 300
+
+# Default colors for comparison entities, following on from the primary one's blue
+COMPARE_COLORS = ["#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
+
+
+def lttb(x, y, n):
+    '''
+    Positions of at most n points of a series picked with largest-triangle-
+    three-buckets: the first and last point, and from every bucket in between
+    the point that makes the largest triangle with its neighbours, which keeps
+    the peaks and troughs that give the line its shape
+    '''
+    length = len(x)
+    if length <= n or n < 3:
+        return np.arange(length)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, length - 1
+    edges = np.linspace(1, length - 1, n - 1).astype(np.int64)
+    selected = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < n - 1 else length
+        next_x, next_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[selected] - next_x) * (y[lo:hi] - y[selected]) - (x[selected] - x[lo:hi]) * (next_y - y[selected]))
+        selected = lo + int(np.argmax(area))
+        keep[i + 1] = selected
+    return keep
+
+
+def decimate(frame, x, y, by=None, max_points=MAX_SERIES_POINTS):
+    '''
+    frame with every series (grouped by `by`, or the whole frame) cut down to
+    at most max_points rows in x order. Rows without a y value are not drawn
+    on a line, so they are dropped from decimated series.
+    '''
+    groups = [frame] if by is None else [series for _, series in frame.groupby(by, sort=False, observed=True)]
+    if all(len(series) <= max_points for series in groups):
+        return frame
+    decimated = []
+    for series in groups:
+        if len(series) > max_points:
+            series = series[series[y].notna()]
+            days = series[x].to_numpy(dtype="datetime64[ns]").astype(np.int64) / 86_400e9
+            series = series.iloc[lttb(days, series[y].to_numpy(dtype=np.float64), max_points)]
+        decimated.append(series)
+    return pd.concat(decimated)
+
+
+def selected_season(state):
+    '''
+    The season loaded in a page's filter state, or None for a custom timeframe
+    '''
+    if state.get("custom_timeframe_selected", False):
+        return None
+    return state.get("race_season", 2024)
+
+
+def selected_races(state):
+    '''
+    Races in the timeframe loaded in a page's filter state, sorted by date
+    '''
+    calendar = data.race_calendar()
+    season = selected_season(state)
+    if season is None:
+        start_date, end_date = state["custom_timeframe"]
+        return calendar.races_in(start=start_date, end=end_date)
+    return calendar.races_in(season=season)
+
+
+def reference_stats(stats, i):
+    '''
+    Stats each entity's deltas are measured against: the primary entity is
+    compared with the first comparison entity, everyone else with the primary
+    '''
+    return stats[1] if i == 0 else stats[0]
+
+
+def season_stats(kind, labels, season, fields, present):
+    '''
+    Stats for every driver or constructor (kind) from the summary cube, one
+    row lookup each. fields maps each stat to its value when the entity has
+    no row, or its `present` stat is missing.
+    '''
+    with profiling.span("load"):
+        summary = data.season_summary()
+    lookup = summary.driver if kind == "driver" else summary.constructor
+    stats = []
+    for entity_id, label in labels.items():
+        row = lookup(entity_id, season) if entity_id is not None else None
+        if row is None or row[present] is None:
+            row = fields
+        stats.append({"label": label, **{field: row[field] for field in fields}})
+    return stats
+
+
+def driver_points(labels, races, season=None):
+    '''
+    Accumulated points over the races for every driver, with each driver's
+    total, best finish and average points per race
+    '''
+    # Running points totals per driver (grand prix + sprint), sorted by race date
+    with profiling.span("load"):
+        ledger = data.driver_points_ledger()
+    timeframe_start = races["date"].min()
+    timeframe_end = races["date"].max()
+
+    # Each driver is a binary search into the ledger, not a pass over the results
+    all_data = []
+    stats = []
+    with profiling.span("aggregate"):
+        for driver_id, label in labels.items():
+            merged = ledger.accumulated(driver_id, timeframe_start, timeframe_end)
+            if not merged.empty:
+                all_data.append(merged.assign(driver=label))
+            if season is not None:
+                continue
+            if not merged.empty:
+                total_points = merged["accum_points"].iloc[-1]
+                stats.append({
+                    "label": label,
+                    "total_points": total_points,
+                    "best_finish": merged["positionOrder"].min(),
+                    "avg_points": total_points / len(merged)
+                })
+            else:
+                stats.append({
+                    "label": label,
+                    "total_points": 0,
+                    "best_finish": None,
+                    "avg_points": 0
+                })
+    if season is not None:
+        fields = {"total_points": 0, "best_finish": None, "avg_points": 0}
+        stats = season_stats("driver", labels, season, fields, "races")
+    points = pd.concat(all_data) if all_data else None
+    return points, stats
+
+
+def driver_points_figure(points, colors):
+    import plotly.express as px
+    with profiling.span("chart"):
+        points = decimate(points, "date", "accum_points", by="driver")
+        fig = px.line(
+            points,
+            x="date",
+            y="accum_points",
+            color="driver",
+            markers=True,
+            labels={"date": "Race Date", "accum_points": "Accumulated Points", "driver": "Driver"},
+            title="Accumulated Points Over Time",
+            color_discrete_map=colors
+        )
+        fig.update_layout(xaxis=dict(tickformat="%Y-%m-%d"))
+    return fig
+
+
+def driver_qualifying(labels, races, season=None):
+    '''
+    Qualifying positions in the races for every driver, sorted by date, with
+    each driver's best and average position and pole count
+    '''
+    # Load qualifying data
+    with profiling.span("load"):
+        qualifying = data.load_table("qualifying")
+
+    # One pass over qualifying for every selected driver
+    with profiling.span("filter"):
+        race_ids = races["raceId"].to_numpy()
+        selected = qualifying[qualifying["driverId"].isin(list(labels)) & qualifying["raceId"].isin(race_ids)]
+
+    with profiling.span("aggregate"):
+        merged = selected.merge(races[["raceId", "date", "name", "year"]], on="raceId", how="left")
+        merged = merged.sort_values("date")
+        merged["driver"] = merged["driverId"].map(labels)
+    if season is not None:
+        fields = {"best_qualifying": None, "avg_qualifying": None, "pole_positions": 0}
+        return merged, season_stats("driver", labels, season, fields, "best_qualifying")
+
+    with profiling.span("aggregate"):
+        merged["pole"] = merged["position"] == 1
+        summary = merged.groupby("driverId").agg(
+            best_qualifying=("position", "min"),
+            avg_qualifying=("position", "mean"),
+            pole_positions=("pole", "sum")
+        )
+
+    stats = []
+    for driver_id, label in labels.items():
+        if driver_id in summary.index:
+            row = summary.loc[driver_id]
+            stats.append({
+                "label": label,
+                "best_qualifying": int(row["best_qualifying"]) if pd.notna(row["best_qualifying"]) else None,
+                "avg_qualifying": row["avg_qualifying"],
+                "pole_positions": int(row["pole_positions"])
+            })
+        else:
+            stats.append({
+                "label": label,
+                "best_qualifying": None,
+                "avg_qualifying": None,
+                "pole_positions": 0
+            })
+    return merged, stats
+
+
+def driver_qualifying_figure(qualifying, colors):
+    import plotly.express as px
+    with profiling.span("chart"):
+        qualifying = decimate(qualifying, "date", "position", by="driver")
+        fig = px.line(
+            qualifying,
+            x="date",
+            y="position",
+            color="driver",
+            markers=True,
+            labels={"date": "Race Date", "position": "Qualifying Position", "driver": "Driver"},
+            title="Qualifying Position Over Time",
+            color_discrete_map=colors
+        )
+        # Reverse y-axis so P1 is at the top
+        fig.update_yaxes(autorange="reversed")
+        fig.update_layout(xaxis=dict(tickformat="%Y-%m-%d"))
+    return fig
+
+
+def driver_pace(labels, races):
+    '''
+    Every driver's gap to pole and delta to their teammate in the races, from
+    the precomputed lap times
+    '''
+    with profiling.span("load"):
+        pace = data.qualifying_pace()
+    with profiling.span("filter"):
+        race_ids = races["raceId"].to_numpy()
+        selected = pace[pace["driverId"].isin(list(labels)) & pace["raceId"].isin(race_ids)]
+    selected = selected.assign(
+        driver=selected["driverId"].map(labels),
+        gap_to_pole_s=selected["gap_to_pole_ms"] / 1000.0,
+        teammate_delta_s=selected["teammate_delta_ms"] / 1000.0,
+    )
+    return selected
+
+
+def driver_pace_figure(pace, colors):
+    import plotly.express as px
+    with profiling.span("chart"):
+        pace = decimate(pace, "date", "gap_to_pole_pct", by="driver")
+        fig = px.line(
+            pace,
+            x="date",
+            y="gap_to_pole_pct",
+            color="driver",
+            markers=True,
+            hover_data={"name": True, "gap_to_pole_s": ":.3f"},
+            labels={"date": "Race Date", "gap_to_pole_pct": "Gap to Pole (%)", "driver": "Driver",
+                    "name": "Race", "gap_to_pole_s": "Gap to Pole (s)"},
+            title="Qualifying Gap to Pole (best lap of Q1-Q3)",
+            color_discrete_map=colors
+        )
+        fig.update_layout(xaxis=dict(tickformat="%Y-%m-%d"))
+    return fig
+
+
+def driver_teammate_figure(teammate, colors):
+    import plotly.express as px
+    with profiling.span("chart"):
+        fig = px.bar(
+            teammate,
+            x="date",
+            y="teammate_delta_s",
+            color="driver",
+            barmode="group",
+            hover_data={"name": True},
+            labels={"date": "Race Date", "teammate_delta_s": "Delta to Teammate (s)", "driver": "Driver", "name": "Race"},
+            title="Qualifying Delta to Teammate (negative is faster)",
+            color_discrete_map=colors
+        )
+        fig.update_layout(xaxis=dict(tickformat="%Y-%m-%d"))
+    return fig
+
+
+def driver_finishing(labels, races, season=None):
+    '''
+    Count of finishes in each position for every driver (None when they have
+    no results in the races), with each driver's average classified finish
+    '''
+    # Load results
+    with profiling.span("load"):
+        results = data.load_table("results")
+
+    # One pass over the results for every selected driver, shared by the chart and the widgets
+    with profiling.span("filter"):
+        race_ids = races["raceId"].to_numpy()
+        selected = results[results["driverId"].isin(list(labels)) & results["raceId"].isin(race_ids)]
+    if selected.empty:
+        return None, []
+
+    with profiling.span("aggregate"):
+        counts = selected.groupby(["driverId", "positionOrder"]).size().reset_index(name="count")
+        # Keep the drivers in the order they were selected
+        counts["order"] = counts["driverId"].map({driver_id: i for i, driver_id in enumerate(labels)})
+        counts = counts.sort_values(["order", "positionOrder"])
+        counts["driver"] = counts["driverId"].map(labels)
+    if season is not None:
+        fields = {"avg_finish": None}
+        return counts, season_stats("driver", labels, season, fields, "avg_finish")
+
+    with profiling.span("aggregate"):
+        # Only count classified finishes (positionOrder > 0)
+        classified = selected[selected["positionOrder"] > 0]
+        avg_finishes = classified.groupby("driverId")["positionOrder"].mean()
+    stats = [
+        {"label": label, "avg_finish": avg_finishes.get(driver_id)}
+        for driver_id, label in labels.items()
+    ]
+    return counts, stats
+
+
+def driver_finishing_figure(counts, colors):
+    import plotly.express as px
+    with profiling.span("chart"):
+        # Determine unique positions for consistent bars across drivers
+        all_positions = sorted(counts["positionOrder"].unique())
+        fig = px.bar(
+            counts,
+            x="positionOrder",
+            y="count",
+            color="driver",
+            barmode="group",
+            labels={"positionOrder": "Finishing Position", "count": "Number of Finishes"},
+            title="Frequency of Finishing Positions",
+            color_discrete_map=colors,
+            category_orders={"positionOrder": all_positions}
+        )
+        fig.update_layout(xaxis={"categoryorder":"category ascending"})
+    return fig
+
+
+def team_points(labels, races, season=None):
+    '''
+    Accumulated points over every race for every team, so all teams share the
+    same x-axis, with each team's total, average and best finish
+    '''
+    with profiling.span("load"):
+        ledger = data.constructor_points_ledger()
+    timeframe_start = races["date"].min()
+    timeframe_end = races["date"].max()
+
+    series = []
+    stats = []
+    # Each team is a binary search into the ledger, not a pass over the results
+    with profiling.span("aggregate"):
+        for team_id, team_name in labels.items():
+            if team_id is None:
+                merged = races[["raceId", "date", "name", "year"]]
+                merged["points"] = 0
+                merged["accum_points"] = 0
+            else:
+                team_races = ledger.accumulated(team_id, timeframe_start, timeframe_end)
+                # Keep every race in the timeframe so all teams share the same x-axis
+                merged = races[["raceId", "date", "name", "year"]].merge(
+                    team_races[["raceId", "points", "accum_points", "positionOrder"]], on="raceId", how="left"
+                )
+                merged["points"] = merged["points"].fillna(0)
+                merged["accum_points"] = merged["accum_points"].ffill().fillna(0)
+            series.append((team_name, merged))
+            if season is not None:
+                continue
+
+            # Get best finish
+            if "positionOrder" in merged.columns and merged["positionOrder"].notna().any():
+                best_finish = int(merged["positionOrder"].min())
+            else:
+                best_finish = None
+            total_points = merged["accum_points"].iloc[-1] if not merged.empty else 0
+            stats.append({
+                "label": team_name,
+                "total_points": total_points,
+                "avg_points": total_points / len(merged) if not merged.empty else 0,
+                "best_finish": best_finish
+            })
+    if season is not None:
+        fields = {"total_points": 0.0, "avg_points": 0.0, "best_finish": None}
+        stats = season_stats("constructor", labels, season, fields, "total_points")
+    return series, stats
+
+
+def team_points_figure(series, colors):
+    import plotly.graph_objects as go
+    with profiling.span("chart"):
+        fig = go.Figure()
+        for team_name, merged in series:
+            merged = decimate(merged, "date", "accum_points")
+            fig.add_scatter(
+                x=merged["date"],
+                y=merged["accum_points"],
+                mode="lines+markers",
+                name=team_name,
+                line=dict(color=colors.get(team_name))
+            )
+        fig.update_layout(
+            xaxis=dict(tickformat="%Y-%m-%d"),
+            title="Accumulated Team Points Over Time",
+            xaxis_title="Race Date",
+            yaxis_title="Accumulated Points"
+        )
+    return fig
+
+
+def team_pit_stops(labels, races, season=None):
+    '''
+    Every pit stop made by the teams in the races, labelled by team, with
+    each team's mean, best and worst stop (sorted by team name)
+    '''
+    race_ids = races["raceId"].to_numpy()
+    labels = {team_id: team_name for team_id, team_name in labels.items() if team_id is not None}
+
+    # Stops are precomputed and attributed to the team each driver drove for in that race
+    with profiling.span("load"):
+        pit_stops = data.pit_stop_facts()
+    with profiling.span("filter"):
+        team_stops = pit_stops[pit_stops["constructorId"].isin(list(labels)) & pit_stops["raceId"].isin(race_ids)]
+    if team_stops.empty:
+        return team_stops, []
+    team_stops = team_stops.assign(team=team_stops["constructorId"].map(labels))
+    if season is not None:
+        fields = {"pit_stops": 0, "mean_pit_stop_s": None, "best_pit_stop_s": None, "worst_pit_stop_s": None}
+        rows = season_stats("constructor", labels, season, fields, "pit_stops")
+        stats = [
+            {"label": row["label"], "count": row["pit_stops"], "mean": row["mean_pit_stop_s"],
+             "best": row["best_pit_stop_s"], "worst": row["worst_pit_stop_s"]}
+            for row in sorted(rows, key=lambda row: row["label"]) if row["pit_stops"]
+        ]
+        return team_stops, stats
+
+    # Combined from the per-race summaries rather than the individual stops
+    with profiling.span("load"):
+        summary = data.team_pit_stop_summary()
+    with profiling.span("aggregate"):
+        team_summary = summary[summary["constructorId"].isin(list(labels)) & summary["raceId"].isin(race_ids)]
+        totals = team_summary.groupby(team_summary["constructorId"].map(labels)).agg(
+            count=("count", "sum"), total=("sum", "sum"), best=("min", "min"), worst=("max", "max")
+        ).sort_index()
+    stats = [
+        {"label": team_name, "count": int(row["count"]), "mean": row["total"] / row["count"], "best": row["best"], "worst": row["worst"]}
+        for team_name, row in totals.iterrows()
+    ]
+    return team_stops, stats
+
+
+def team_pit_stops_figure(team_stops):
+    import plotly.express as px
+    with profiling.span("chart"):
+        team_order = sorted(team_stops["team"].unique())
+        team_stops = team_stops.assign(team=pd.Categorical(team_stops["team"], categories=team_order, ordered=True))
+        fig = px.box(
+            team_stops,
+            x="team",
+            y="duration_s",
+            points="outliers",
+            color="team",
+            labels={"duration_s": "Pit Stop Duration (s)", "team": "Team"},
+            title="Pit Stop Time Distribution (Box Plot)",
+            category_orders={"team": team_order}
+        )
+        fig.update_traces(jitter=0.3, marker=dict(size=6, opacity=0.7))
+        fig.update_layout(yaxis=dict(title="Pit Stop Duration (s)", range=[0, 40]))
+    return fig
@@ -0,0 +1,869 @@
+import argparse
+import functools
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "archive")
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshot")
+MANIFEST_PATH = os.path.join(SNAPSHOT_DIR, "manifest.json")
+# Rows normalized from newer sources (see ingest.py), appended to the archive tables
+INGEST_DIR = os.path.join(SNAPSHOT_DIR, "ingested")
+
+TABLES = [
+    "circuits",
+    "constructor_results",
+    "constructor_standings",
+    "constructors",
+    "driver_standings",
+    "drivers",
+    "pit_stops",
+    "qualifying",
+    "races",
+    "results",
+    "seasons",
+    "sprint_results",
+    "status",
+]
+
+# The archive writes missing values as \N (and a few empty qualifying times)
+NA_VALUES = ["\\N", ""]
+
+# Explicit column types for every archive table. Ids, positions and laps use
+# the smallest Arrow-backed integer that fits, so snapshot columns are used
+# straight from the memory-mapped file, repeated labels are categoricals and
+# anything not listed (free text, lap time strings, urls) is left to pandas.
+INT8, INT16, INT32 = "int8[pyarrow]", "int16[pyarrow]", "int32[pyarrow]"
+SCHEMAS = {
+    "circuits": {
+        "circuitId": INT16, "country": "category",
+        "lat": "float32", "lng": "float32", "alt": INT16,
+    },
+    "constructor_results": {
+        "constructorResultsId": INT32, "raceId": INT16, "constructorId": INT16,
+        "points": "float64", "status": "category",
+    },
+    "constructor_standings": {
+        "constructorStandingsId": INT32, "raceId": INT16, "constructorId": INT16,
+        "points": "float64", "position": INT16, "positionText": "category", "wins": INT8,
+    },
+    "constructors": {
+        "constructorId": INT16, "nationality": "category",
+    },
+    "driver_standings": {
+        "driverStandingsId": INT32, "raceId": INT16, "driverId": INT16,
+        "points": "float64", "position": INT16, "positionText": "category", "wins": INT8,
+    },
+    "drivers": {
+        "driverId": INT16, "number": INT16, "nationality": "category",
+    },
+    "pit_stops": {
+        "raceId": INT16, "driverId": INT16, "stop": INT8, "lap": INT16,
+        "milliseconds": INT32,
+    },
+    "qualifying": {
+        "qualifyId": INT32, "raceId": INT16, "driverId": INT16, "constructorId": INT16,
+        "number": INT16, "position": INT8,
+    },
+    "races": {
+        "raceId": INT16, "year": INT16, "round": INT8, "circuitId": INT16,
+        "name": "category",
+    },
+    "results": {
+        "resultId": INT32, "raceId": INT16, "driverId": INT16, "constructorId": INT16,
+        "number": INT16, "grid": INT8, "position": INT8, "positionText": "category",
+        "positionOrder": INT8, "points": "float64", "laps": INT16, "milliseconds": INT32,
+        "fastestLap": INT16, "rank": INT8, "fastestLapSpeed": "float32", "statusId": INT16,
+    },
+    "seasons": {
+        "year": INT16,
+    },
+    "sprint_results": {
+        "resultId": INT32, "raceId": INT16, "driverId": INT16, "constructorId": INT16,
+        "number": INT16, "grid": INT8, "position": INT8, "positionText": "category",
+        "positionOrder": INT8, "points": "float64", "laps": INT16, "milliseconds": INT32,
+        "fastestLap": INT16, "statusId": INT16,
+    },
+    "status": {
+        "statusId": INT16, "status": "category",
+    },
+}
+
+DATE_COLUMNS = {
+    "drivers": ["dob"],
+    "races": ["date"],
+}
+
+# Lap time strings parsed once at load into an INT32 "<column>_ms" column
+TIME_COLUMNS = {
+    "qualifying": ["q1", "q2", "q3"],
+    "results": ["fastestLapTime"],
+    "sprint_results": ["fastestLapTime"],
+}
+
+# h:mm:ss.sss, m:ss.sss or ss.sss
+TIME_PATTERN = r"^(?:(?:(?P<hours>\d+):)?(?P<minutes>\d+):)?(?P<seconds>\d+(?:\.\d+)?)$"
+
+# Bumped whenever load-time columns or types change, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 3
+
+# Process-wide cache: table name -> (file signature, DataFrame)
+_cache = {}
+_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+# Derived tables can be built from other derived tables, so this one re-enters
+_derived_lock = threading.RLock()
+# (builder name, cached state) of every derived table
+_derived_states = []
+
+
+def table_path(name):
+    return os.path.join(DATA_DIR, f"{name}.csv")
+
+
+def snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.arrow")
+
+
+def ingested_path(name):
+    return os.path.join(INGEST_DIR, f"{name}.arrow")
+
+
+def _signature(path):
+    '''
+    Cheap fingerprint of a file so edits to the archive invalidate the cache
+    '''
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _source_signature(name):
+    '''
+    Fingerprint of everything a table is loaded from: the archive CSV and any
+    ingested rows
+    '''
+    path = ingested_path(name)
+    return [_signature(table_path(name)), _signature(path) if os.path.exists(path) else None]
+
+
+def time_to_ms(values):
+    '''
+    Parse lap and race time strings to integer milliseconds in one vectorized
+    pass. Anything that is not a time (\\N, DNF, +1 lap, missing) becomes NA.
+    '''
+    parts = pd.Series(values, dtype="string").str.strip().str.extract(TIME_PATTERN)
+    hours = pd.to_numeric(parts["hours"]).fillna(0)
+    minutes = pd.to_numeric(parts["minutes"]).fillna(0)
+    seconds = pd.to_numeric(parts["seconds"])
+    ms = ((hours * 60 + minutes) * 60 + seconds) * 1000
+    return ms.round().astype(INT32)
+
+
+def with_time_columns(name, df):
+    '''
+    Add the precomputed millisecond column for every lap time column of a table
+    '''
+    for column in TIME_COLUMNS.get(name, []):
+        if column in df:
+            df[f"{column}_ms"] = time_to_ms(df[column]).array
+    return df
+
+
+def _read_csv(name):
+    df = pd.read_csv(
+        table_path(name),
+        dtype=SCHEMAS.get(name),
+        na_values=NA_VALUES,
+        keep_default_na=False,
+        parse_dates=DATE_COLUMNS.get(name, False),
+    )
+    return with_time_columns(name, df)
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_snapshot(name, source):
+    '''
+    Read a table from the columnar snapshot if it was built from `source`.
+    Returns None when the snapshot is missing or stale.
+    '''
+    entry = _read_manifest().get(name)
+    path = snapshot_path(name)
+    if entry is None or entry.get("source") != source or entry.get("version") != SNAPSHOT_VERSION:
+        return None
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_arrow(path)
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def read_arrow(path):
+    '''
+    Read an Arrow IPC file into a frame without parsing any text. Integer,
+    string and null-free float columns keep using the memory-mapped buffers,
+    so processes reading the same snapshot share it through the page cache;
+    only categoricals and floats with nulls are copied.
+    '''
+    with pa.memory_map(path) as source_file:
+        table = pa.ipc.open_file(source_file).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def write_arrow(path, df):
+    '''
+    Write a frame to an Arrow IPC file, replacing any previous file atomically
+    '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(name, df, source):
+    '''
+    Write a table to the snapshot and record the source it was built from
+    '''
+    write_arrow(snapshot_path(name), df)
+
+    with _manifest_lock:
+        manifest = _read_manifest()
+        manifest[name] = {"source": source, "version": SNAPSHOT_VERSION, "rows": len(df)}
+        tmp_manifest = MANIFEST_PATH + ".tmp"
+        with open(tmp_manifest, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, MANIFEST_PATH)
+
+
+def build_snapshot(tables=None):
+    '''
+    Convert archive CSVs into the columnar snapshot read by load_table
+    '''
+    built = []
+    for name in tables or TABLES:
+        source = _signature(table_path(name))
+        write_snapshot(name, _read_csv(name), source)
+        built.append(name)
+    return built
+
+
+def append_rows(df, rows):
+    '''
+    Concatenate rows onto a typed table, keeping its column types. Categories
+    are widened to cover any new labels in the appended rows.
+    '''
+    df = df.copy()
+    rows = rows.reindex(columns=df.columns)
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = dtype.categories.union(pd.Index(rows[column].dropna().unique()).astype(dtype.categories.dtype))
+            df[column] = df[column].cat.set_categories(categories)
+            rows[column] = pd.Categorical(rows[column], categories=categories)
+        else:
+            rows[column] = rows[column].astype(dtype)
+    return pd.concat([df, rows], ignore_index=True)
+
+
+def load_table(name):
+    '''
+    Load an archive table once per process and share it between all sessions.
+    The snapshot is preferred, falling back to the CSV when it is missing or
+    stale, and any ingested rows are appended. The returned frame is shared,
+    so callers must never modify it in place.
+    '''
+    if name not in TABLES:
+        raise KeyError(f"Unknown archive table: {name}")
+    signature = _source_signature(name)
+
+    cached = _cache.get(name)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _lock:
+        # Another session may have loaded it while we waited for the lock
+        cached = _cache.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        df = read_snapshot(name, signature[0])
+        if df is None:
+            df = _read_csv(name)
+        if signature[1] is not None:
+            df = append_rows(df, with_time_columns(name, read_arrow(ingested_path(name))))
+        _cache[name] = (signature, df)
+        return df
+
+
+def data_version():
+    '''
+    Fingerprint of every archive table, for caches of anything built from them
+    '''
+    return json.dumps([_source_signature(name) for name in TABLES])
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+    with _derived_lock:
+        for _, state in _derived_states:
+            state.clear()
+
+
+def shared_objects():
+    '''
+    (kind, name, object) for every table and derived table this process
+    holds, which every session shares
+    '''
+    objects = [("table", name, df) for name, (_, df) in sorted(_cache.items())]
+    objects += [("derived", name, state["value"]) for name, state in _derived_states if "value" in state]
+    return objects
+
+
+def derived(*sources):
+    '''
+    Cache the result of a builder function once per process, rebuilding it
+    only when one of the archive tables it is derived from changes
+    '''
+    def decorator(build):
+        state = {}
+
+        @functools.wraps(build)
+        def wrapper():
+            signature = [_source_signature(name) for name in sources]
+            if state.get("signature") == signature:
+                return state["value"]
+            with _derived_lock:
+                if state.get("signature") != signature:
+                    state["value"] = build()
+                    state["signature"] = signature
+                return state["value"]
+
+        _derived_states.append((build.__name__, state))
+        return wrapper
+    return decorator
+
+
+FACT_KEYS = ["raceId", "driverId", "constructorId"]
+FACT_SOURCES = ("results", "sprint_results", "races", "status")
+
+
+@derived(*FACT_SOURCES)
+def race_facts():
+    '''
+    One row per (raceId, driverId, constructorId) combining the grand prix and
+    sprint of a race weekend, sorted by race date.
+    points is race + sprint points, positionOrder the best finish of the weekend,
+    grid and status come from the grand prix.
+    '''
+    results = load_table("results")
+    sprint_results = load_table("sprint_results")
+    races = load_table("races")
+    status = load_table("status")
+
+    # Shared drives in the 1950s give a driver several results for one team in
+    # one race, so keep the grid and status of their best placed car
+    race_rows = (
+        results.sort_values("positionOrder")
+        .groupby(FACT_KEYS, as_index=False, sort=False)
+        .agg(
+            race_points=("points", "sum"),
+            race_position=("positionOrder", "first"),
+            grid=("grid", "first"),
+            statusId=("statusId", "first"),
+        )
+    )
+    sprint_rows = sprint_results[FACT_KEYS + ["points", "positionOrder"]].rename(
+        columns={"points": "sprint_points", "positionOrder": "sprint_position"}
+    )
+
+    facts = race_rows.merge(sprint_rows, on=FACT_KEYS, how="outer")
+    facts["race_points"] = facts["race_points"].fillna(0)
+    facts["sprint_points"] = facts["sprint_points"].fillna(0)
+    facts["points"] = facts["race_points"] + facts["sprint_points"]
+    facts["positionOrder"] = facts[["race_position", "sprint_position"]].min(axis=1).astype("Int8")
+    facts = facts.merge(status, on="statusId", how="left")
+    facts = facts.merge(races[["raceId", "year", "round", "date"]], on="raceId", how="left")
+
+    columns = FACT_KEYS + [
+        "year", "round", "date", "points", "race_points", "sprint_points",
+        "positionOrder", "grid", "statusId", "status",
+    ]
+    facts = facts[columns].sort_values(["date", "raceId", "positionOrder"])
+    return facts.reset_index(drop=True)
+
+
+@derived(*FACT_SOURCES)
+def constructor_race_facts():
+    '''
+    race_facts rolled up to one row per (raceId, constructorId): the team's
+    combined points and its best finish of the weekend
+    '''
+    facts = race_facts()
+    team_facts = facts.groupby(["raceId", "constructorId"], as_index=False, sort=False).agg(
+        year=("year", "first"),
+        round=("round", "first"),
+        date=("date", "first"),
+        points=("points", "sum"),
+        race_points=("race_points", "sum"),
+        sprint_points=("sprint_points", "sum"),
+        positionOrder=("positionOrder", "min"),
+    )
+    return team_facts.sort_values(["date", "raceId"]).reset_index(drop=True)
+
+
+@derived("qualifying", "races")
+def qualifying_pace():
+    '''
+    One row per (raceId, driverId) with the driver's best qualifying lap over
+    Q1-Q3, the gap to the pole lap and the delta to their teammate's best lap.
+    Gaps are in milliseconds and as a percentage of the pole lap so races on
+    different tracks can share an axis. Sorted by race date.
+    '''
+    qualifying = load_table("qualifying")
+    races = load_table("races")
+
+    pace = qualifying[["raceId", "driverId", "constructorId", "position"]].copy()
+    pace["best_ms"] = qualifying[["q1_ms", "q2_ms", "q3_ms"]].min(axis=1).astype("Int32")
+    pace = pace[pace["best_ms"].notna()]
+
+    pole_ms = pace.groupby("raceId")["best_ms"].transform("min")
+    pace["gap_to_pole_ms"] = pace["best_ms"] - pole_ms
+    pace["gap_to_pole_pct"] = (pace["gap_to_pole_ms"] / pole_ms * 100).astype("float64")
+
+    # With exactly two cars timed, the teammate's lap is the team total minus our own
+    team = pace.groupby(["raceId", "constructorId"])["best_ms"]
+    teammate_ms = (team.transform("sum") - pace["best_ms"]).where(team.transform("count") == 2)
+    pace["teammate_delta_ms"] = pace["best_ms"] - teammate_ms
+
+    pace = pace.merge(races[["raceId", "year", "round", "date", "name"]], on="raceId", how="left")
+    return pace.sort_values(["date", "raceId", "best_ms"]).reset_index(drop=True)
+
+
+# Stops timed outside (0, 40s] are red flags, drive-throughs or timing errors
+PIT_STOP_MAX_MS = 40000
+
+
+@derived("pit_stops", "results", "races")
+def pit_stop_facts():
+    '''
+    Every timed pit stop joined to the team the driver drove for in that race,
+    keyed by (raceId, driverId) so a driver who changed teams has each stop
+    attributed to the right one. Only stops within (0, PIT_STOP_MAX_MS] are
+    kept. Sorted by constructorId, then race date.
+    '''
+    pit_stops = load_table("pit_stops")
+    results = load_table("results")
+    races = load_table("races")
+
+    stops = pit_stops[(pit_stops["milliseconds"] > 0) & (pit_stops["milliseconds"] <= PIT_STOP_MAX_MS)]
+    teams = results[["raceId", "driverId", "constructorId"]].drop_duplicates(["raceId", "driverId"])
+    facts = stops[["raceId", "driverId", "stop", "lap", "milliseconds"]].merge(teams, on=["raceId", "driverId"])
+    facts["duration_s"] = (facts["milliseconds"] / 1000.0).astype("float64")
+    facts = facts.merge(races[["raceId", "year", "date"]], on="raceId", how="left")
+    return facts.sort_values(["constructorId", "date", "raceId"], kind="stable").reset_index(drop=True)
+
+
+@derived("pit_stops", "results", "races")
+def team_pit_stop_summary():
+    '''
+    pit_stop_facts aggregated to one row per (raceId, constructorId): the number
+    of stops, their total, mean, min, max and quartiles in seconds
+    '''
+    facts = pit_stop_facts()
+    by_race = facts.groupby(["raceId", "constructorId"])["duration_s"]
+    summary = by_race.agg(["count", "sum", "mean", "min", "max"])
+    quartiles = by_race.quantile([0.25, 0.5, 0.75]).unstack()
+    summary[["q1", "median", "q3"]] = quartiles.to_numpy()
+    summary = summary.reset_index().merge(facts[["raceId", "year", "date"]].drop_duplicates("raceId"), on="raceId")
+    return summary.sort_values(["constructorId", "date"], kind="stable").reset_index(drop=True)
+
+
+class RaceCalendar:
+    '''
+    Races sorted by date so a season or custom date window resolves to a
+    contiguous block of rows with a binary search instead of a full scan
+    '''
+
+    def __init__(self, races):
+        self.races = races.sort_values(["date", "raceId"]).reset_index(drop=True)
+        self.dates = self.races["date"].to_numpy(dtype="datetime64[ns]")
+        # Seasons never overlap, so years are sorted along with the dates
+        self.years = self.races["year"].to_numpy(dtype=np.int64)
+        self.race_ids = self.races["raceId"].to_numpy(dtype=np.int64)
+        self.first_date = self.races["date"].min().date() if len(self.races) else None
+        self.last_date = self.races["date"].max().date() if len(self.races) else None
+
+    def window(self, season=None, start=None, end=None):
+        '''
+        Row slice for a season, or for races between start and end inclusive
+        '''
+        if season is not None:
+            lo = np.searchsorted(self.years, season, side="left")
+            hi = np.searchsorted(self.years, season, side="right")
+        else:
+            lo = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+            hi = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "ns"), side="right")
+        return slice(int(lo), int(hi))
+
+    def races_in(self, season=None, start=None, end=None):
+        return self.races.iloc[self.window(season, start, end)]
+
+    def race_ids_in(self, season=None, start=None, end=None):
+        return self.race_ids[self.window(season, start, end)]
+
+
+@derived("races")
+def race_calendar():
+    return RaceCalendar(load_table("races"))
+
+
+def first_race_date():
+    '''
+    Date of the first race in the data
+    '''
+    return race_calendar().first_date
+
+
+def last_race_date():
+    '''
+    Date of the latest race in the data, ingested seasons included
+    '''
+    return race_calendar().last_date
+
+
+class PointsLedger:
+    '''
+    Chronological prefix sums of points for every driver or constructor.
+    Each entity owns a contiguous block of rows sorted by date, so the points
+    accumulated over any window are a slice of the running total minus the
+    total just before the window starts.
+    '''
+
+    def __init__(self, facts, key):
+        # Stable sort keeps the date order of the facts inside each entity
+        ordered = facts.sort_values(key, kind="stable")
+        self.key = key
+        self.dates = ordered["date"].to_numpy(dtype="datetime64[ns]")
+        self.race_ids = ordered["raceId"].to_numpy(dtype=np.int64)
+        self.points = ordered["points"].to_numpy(dtype=np.float64)
+        self.positions = ordered["positionOrder"].array
+        self.cumulative = np.concatenate([[0.0], np.cumsum(self.points)])
+
+        ids = ordered[key].to_numpy(dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        stops = np.r_[starts[1:], len(ids)]
+        self.blocks = dict(zip(ids[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+
+    def window(self, entity_id, start, end):
+        '''
+        Row range [lo, hi) of an entity's races between start and end inclusive
+        '''
+        first, last = self.blocks.get(int(entity_id), (0, 0))
+        if pd.isna(start) or pd.isna(end):
+            return first, first
+        dates = self.dates[first:last]
+        lo = first + np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns"), side="left")
+        hi = first + np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns"), side="right")
+        return int(lo), int(hi)
+
+    def total(self, entity_id, start, end):
+        lo, hi = self.window(entity_id, start, end)
+        return self.cumulative[hi] - self.cumulative[lo]
+
+    def accumulated(self, entity_id, start, end):
+        '''
+        One row per race in the window with the points scored and the running
+        total since the window started
+        '''
+        lo, hi = self.window(entity_id, start, end)
+        return pd.DataFrame({
+            "raceId": self.race_ids[lo:hi],
+            "date": self.dates[lo:hi],
+            "points": self.points[lo:hi],
+            "positionOrder": self.positions[lo:hi],
+            "accum_points": self.cumulative[lo + 1:hi + 1] - self.cumulative[lo],
+        })
+
+
+@derived(*FACT_SOURCES)
+def driver_points_ledger():
+    return PointsLedger(race_facts(), "driverId")
+
+
+@derived(*FACT_SOURCES)
+def constructor_points_ledger():
+    return PointsLedger(constructor_race_facts(), "constructorId")
+
+
+# The summary cube is persisted next to the snapshot tables under these names
+SUMMARY_SOURCES = ("results", "sprint_results", "races", "status", "qualifying", "pit_stops")
+SUMMARY_TABLES = ["driver_season_summary", "constructor_season_summary"]
+
+
+def build_season_summary():
+    '''
+    Every stat shown in the driver and team page widgets, for every driver and
+    constructor in every season, as a (drivers, constructors) pair of frames
+    keyed by id and year. Each stat is computed the same way the pages
+    compute it from the raw rows for a season.
+    '''
+    races = load_table("races")[["raceId", "year"]]
+
+    facts = race_facts()
+    drivers = facts.groupby(["driverId", "year"]).agg(
+        races=("raceId", "size"),
+        total_points=("points", "sum"),
+        best_finish=("positionOrder", "min"),
+    )
+    drivers["avg_points"] = drivers["total_points"] / drivers["races"]
+
+    qualifying = load_table("qualifying").merge(races, on="raceId")
+    qualifying["pole"] = qualifying["position"] == 1
+    drivers = drivers.join(qualifying.groupby(["driverId", "year"]).agg(
+        best_qualifying=("position", "min"),
+        avg_qualifying=("position", "mean"),
+        pole_positions=("pole", "sum"),
+    ), how="outer")
+
+    # Only classified finishes count towards the average finish
+    results = load_table("results")
+    classified = results[results["positionOrder"] > 0].merge(races, on="raceId")
+    avg_finish = classified.groupby(["driverId", "year"])["positionOrder"].mean().rename("avg_finish")
+    drivers = drivers.join(avg_finish, how="outer")
+    drivers["races"] = drivers["races"].astype("Int16")
+    drivers["pole_positions"] = drivers["pole_positions"].fillna(0).astype("Int16")
+
+    team_facts = constructor_race_facts()
+    constructors = team_facts.groupby(["constructorId", "year"]).agg(
+        total_points=("points", "sum"),
+        best_finish=("positionOrder", "min"),
+    )
+    # A team's average is over every race of the season, entered or not
+    season_races = races.groupby("year").size()
+    constructors["races"] = season_races.reindex(constructors.index.get_level_values("year")).to_numpy()
+    constructors["avg_points"] = constructors["total_points"] / constructors["races"]
+
+    stops = team_pit_stop_summary().groupby(["constructorId", "year"]).agg(
+        pit_stops=("count", "sum"),
+        pit_stop_total_s=("sum", "sum"),
+        best_pit_stop_s=("min", "min"),
+        worst_pit_stop_s=("max", "max"),
+    )
+    stops["mean_pit_stop_s"] = stops["pit_stop_total_s"] / stops["pit_stops"]
+    constructors = constructors.join(stops, how="outer")
+    constructors["pit_stops"] = constructors["pit_stops"].fillna(0).astype("Int32")
+
+    return drivers.reset_index(), constructors.reset_index()
+
+
+class SeasonSummary:
+    '''
+    Single-row lookups into the per-season stats of every driver and constructor
+    '''
+
+    def __init__(self, drivers, constructors):
+        self.drivers = drivers
+        self.constructors = constructors
+        self.driver_positions = self._positions(drivers, "driverId")
+        self.constructor_positions = self._positions(constructors, "constructorId")
+
+    @staticmethod
+    def _positions(frame, key):
+        ids = frame[key].to_numpy(dtype=np.int64).tolist()
+        years = frame["year"].to_numpy(dtype=np.int64).tolist()
+        return dict(zip(zip(ids, years), range(len(frame))))
+
+    @staticmethod
+    def _row(frame, position):
+        '''
+        One row as plain Python values, with None for missing stats
+        '''
+        if position is None:
+            return None
+        row = {}
+        for name in frame.columns:
+            value = frame[name].iat[position]
+            row[name] = None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+        return row
+
+    def driver(self, driver_id, season):
+        return self._row(self.drivers, self.driver_positions.get((int(driver_id), int(season))))
+
+    def constructor(self, constructor_id, season):
+        return self._row(self.constructors, self.constructor_positions.get((int(constructor_id), int(season))))
+
+
+def write_season_summary():
+    '''
+    Build the summary cube from the current data and persist it with the snapshot
+    '''
+    source = [_source_signature(name) for name in SUMMARY_SOURCES]
+    frames = build_season_summary()
+    for name, frame in zip(SUMMARY_TABLES, frames):
+        write_snapshot(name, frame, source)
+    return frames
+
+
+@derived(*SUMMARY_SOURCES)
+def season_summary():
+    '''
+    The summary cube, read from the snapshot when it was built from the
+    current data. Otherwise it is rebuilt, and persisted again if a snapshot
+    exists.
+    '''
+    source = [_source_signature(name) for name in SUMMARY_SOURCES]
+    frames = [read_snapshot(name, source) for name in SUMMARY_TABLES]
+    if any(frame is None for frame in frames):
+        frames = write_season_summary() if os.path.exists(MANIFEST_PATH) else build_season_summary()
+    return SeasonSummary(*frames)
+
+
+class EntityIndex:
+    '''
+    Hash lookups between display names, ids and the metadata row of every
+    driver or constructor
+    '''
+
+    def __init__(self, table, id_column, names):
+        records = table.to_dict("records")
+        ids = table[id_column].astype(int).tolist()
+        self.records = dict(zip(ids, records))
+        self.names = dict(zip(ids, names))
+        self.ids = dict(zip(names, ids))
+
+    def id_of(self, name):
+        return self.ids.get(name)
+
+    def name_of(self, entity_id):
+        return self.names.get(int(entity_id))
+
+    def record(self, entity_id):
+        return self.records.get(int(entity_id))
+
+    def record_by_name(self, name):
+        entity_id = self.id_of(name)
+        return None if entity_id is None else self.records[entity_id]
+
+
+@derived("drivers")
+def driver_index():
+    drivers = load_table("drivers")
+    names = (drivers["forename"] + " " + drivers["surname"]).astype(str)
+    # Fall back to the unique driverRef should two drivers ever share a name
+    clash = names.duplicated(keep=False)
+    names = names.where(~clash, names + " (" + drivers["driverRef"].astype(str) + ")")
+    return EntityIndex(drivers, "driverId", names.tolist())
+
+
+@derived("constructors")
+def constructor_index():
+    constructors = load_table("constructors")
+    return EntityIndex(constructors, "constructorId", constructors["name"].astype(str).tolist())
+
+
+@derived("results", "races", "drivers", "constructors")
+def driver_constructors():
+    '''
+    Every driver in the archive by name, with their most recent constructor
+    '''
+    results = load_table("results")
+    drivers = load_table("drivers").set_index("driverId")
+
+    # Get the last team for each driver, by the date of the race
+    race_dates = race_calendar().races.set_index("raceId")["date"]
+    latest = results.assign(date=results["raceId"].map(race_dates))
+    latest = latest.sort_values(["driverId", "date"]).drop_duplicates("driverId", keep="last")
+    driver_ids = latest["driverId"].to_numpy()
+    driver_info = drivers.loc[driver_ids]
+
+    # Prefer the race number, falling back to the driver's permanent number;
+    # early drivers have neither, and get None
+    driver_numbers = latest["number"].fillna(pd.Series(driver_info["number"].to_numpy(), index=latest.index))
+    drivers_by_id = driver_index()
+    constructors_by_id = constructor_index()
+    return {
+        drivers_by_id.name_of(driver_id): {
+            "driverId": driver_id,
+            "TeamName": constructors_by_id.name_of(constructor_id),
+            "DriverNumber": None if pd.isna(number) else int(number),
+            "forename": forename,
+            "surname": surname
+        }
+        for driver_id, constructor_id, number, forename, surname in zip(
+            driver_ids.tolist(),
+            latest["constructorId"].tolist(),
+            driver_numbers.tolist(),
+            driver_info["forename"].tolist(),
+            driver_info["surname"].tolist(),
+        )
+    }
+
+
+@derived("results", "constructors")
+def team_names():
+    '''
+    Names of all teams that have raced in any season, sorted
+    '''
+    results = load_table("results")
+    team_ids = results["constructorId"].unique()
+    constructors_by_id = constructor_index()
+    return sorted(constructors_by_id.name_of(team_id) for team_id in team_ids)
+
+
+def memory_report(tables=None):
+    '''
+    Bytes held by each table when read with default pandas settings versus
+    the typed schema, as a DataFrame with one row per table
+    '''
+    rows = []
+    for name in tables or TABLES:
+        default_bytes = pd.read_csv(table_path(name)).memory_usage(deep=True).sum()
+        typed_bytes = _read_csv(name).memory_usage(deep=True).sum()
+        rows.append({
+            "table": name,
+            "default_bytes": int(default_bytes),
+            "typed_bytes": int(typed_bytes),
+            "saving": f"{(1 - typed_bytes / default_bytes) * 100:.1f}%",
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F1 archive data tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    snapshot_parser = subparsers.add_parser("snapshot", help="Build the columnar snapshot of the archive")
+    snapshot_parser.add_argument("tables", nargs="*", help="Tables to rebuild (default: all)")
+    memory_parser = subparsers.add_parser("memory", help="Report bytes per table before and after typing")
+    memory_parser.add_argument("tables", nargs="*", help="Tables to report (default: all)")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        for name in build_snapshot(args.tables):
+            print(f"Wrote {snapshot_path(name)}")
+        write_season_summary()
+        for name in SUMMARY_TABLES:
+            print(f"Wrote {snapshot_path(name)}")
+    elif args.command == "memory":
+        report = memory_report(args.tables)
+        print(report.to_string(index=False))
+        total_default = report["default_bytes"].sum()
+        total_typed = report["typed_bytes"].sum()
+        print(f"Total: {total_default:,} -> {total_typed:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+import data
+import profiling
+
+# Memory cap of the figure cache, shared by every session of the server process
+MAX_MB = float(os.environ.get("FIGURE_CACHE_MB", 64))
+
+
+class FigureCache:
+    '''
+    Least recently used cache of Plotly figures, held as their JSON so the
+    memory they use can be counted and capped
+    '''
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        '''
+        The figure cached under key, or None
+        '''
+        with self._lock:
+            spec = self.entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        import plotly.graph_objects as go
+        # The JSON came from a valid figure, so skip validating it again
+        return go.Figure(json.loads(spec), _validate=False)
+
+    def put(self, key, fig):
+        spec = fig.to_json()
+        size = sys.getsizeof(spec)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.bytes -= sys.getsizeof(self.entries.pop(key))
+            while self.entries and self.bytes + size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= sys.getsizeof(evicted)
+                self.evictions += 1
+            self.entries[key] = spec
+            self.bytes += size
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "figures": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache = FigureCache(int(MAX_MB * 1024 * 1024))
+
+
+def timeframe_of(races):
+    '''
+    The first and last race date, which is all a chart's timeframe depends on
+    '''
+    if races.empty:
+        return None
+    return str(races["date"].min().date()), str(races["date"].max().date())
+
+
+def cached(kind, labels, races, colors, build):
+    '''
+    The figure of the given chart kind for the entities ({id: label}), races
+    and colors, built with build() only when it is not in the cache
+    '''
+    key = (kind, tuple(labels.items()), timeframe_of(races), tuple((colors or {}).items()), data.data_version())
+    with profiling.span("chart"):
+        fig = _cache.get(key)
+    if fig is None:
+        fig = build()
+        _cache.put(key, fig)
+    return fig
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def show_cache_stats(container):
+    stats = cache_stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+    container.caption(
+        f"Figure cache: {stats['hits']} hits, {stats['misses']} misses ({hit_rate} hit rate), "
+        f"{stats['figures']} figures in {stats['bytes'] / 1024 / 1024:.2f} of {stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+        f"{stats['evictions']} evicted"
+    )
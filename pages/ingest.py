@@ -0,0 +1,366 @@
+import argparse
+import hashlib
+import json
+import os
+import unicodedata
+import pandas as pd
+import data
+
+SEASON_2025_DIR = os.path.join(data.BASE_DIR, "F1_2025_Dataset")
+STATE_PATH = os.path.join(data.INGEST_DIR, "state.json")
+
+# Source file -> archive table its rows are normalized into
+SOURCES = {
+    "Formula1_2025Season_RaceResults.csv": "results",
+    "Formula1_2025Season_SprintResults.csv": "sprint_results",
+    "Formula1_2025Season_QualifyingResults.csv": "qualifying",
+}
+
+# The 2025 files name races by track only: round, circuitRef, race name, date
+# and whether the weekend has a sprint
+CALENDAR_2025 = {
+    "Australia": (1, "albert_park", "Australian Grand Prix", "2025-03-16", False),
+    "China": (2, "shanghai", "Chinese Grand Prix", "2025-03-23", True),
+    "Japan": (3, "suzuka", "Japanese Grand Prix", "2025-04-06", False),
+    "Bahrain": (4, "bahrain", "Bahrain Grand Prix", "2025-04-13", False),
+    "Saudi Arabia": (5, "jeddah", "Saudi Arabian Grand Prix", "2025-04-20", False),
+    "Miami": (6, "miami", "Miami Grand Prix", "2025-05-04", True),
+    "Emilia-Romagna": (7, "imola", "Emilia Romagna Grand Prix", "2025-05-18", False),
+    "Monaco": (8, "monaco", "Monaco Grand Prix", "2025-05-25", False),
+    "Spain": (9, "catalunya", "Spanish Grand Prix", "2025-06-01", False),
+    "Canada": (10, "villeneuve", "Canadian Grand Prix", "2025-06-15", False),
+    "Austria": (11, "red_bull_ring", "Austrian Grand Prix", "2025-06-29", False),
+    "Great Britain": (12, "silverstone", "British Grand Prix", "2025-07-06", False),
+    "Belgium": (13, "spa", "Belgian Grand Prix", "2025-07-27", True),
+    "Hungary": (14, "hungaroring", "Hungarian Grand Prix", "2025-08-03", False),
+    "Netherlands": (15, "zandvoort", "Dutch Grand Prix", "2025-08-31", False),
+    "Italy": (16, "monza", "Italian Grand Prix", "2025-09-07", False),
+    "Azerbaijan": (17, "baku", "Azerbaijan Grand Prix", "2025-09-21", False),
+    "Singapore": (18, "marina_bay", "Singapore Grand Prix", "2025-10-05", False),
+    "United States": (19, "americas", "United States Grand Prix", "2025-10-19", True),
+    "Mexico": (20, "rodriguez", "Mexico City Grand Prix", "2025-10-26", False),
+    "Brazil": (21, "interlagos", "São Paulo Grand Prix", "2025-11-09", True),
+    "Las Vegas": (22, "vegas", "Las Vegas Grand Prix", "2025-11-22", False),
+    "Qatar": (23, "losail", "Qatar Grand Prix", "2025-11-30", True),
+    "Abu Dhabi": (24, "yas_marina", "Abu Dhabi Grand Prix", "2025-12-07", False),
+}
+SEASON_2025_ROUNDS = len(CALENDAR_2025)
+SEASON_2025_SPRINTS = sum(sprint for *_, sprint in CALENDAR_2025.values())
+
+# Team strings include the engine supplier; map them to the archive's constructorRef
+TEAM_CONSTRUCTORS = {
+    "Alpine Renault": "alpine",
+    "Aston Martin Aramco Mercedes": "aston_martin",
+    "Ferrari": "ferrari",
+    "Haas Ferrari": "haas",
+    "Kick Sauber Ferrari": "sauber",
+    "McLaren Mercedes": "mclaren",
+    "Mercedes": "mercedes",
+    "Racing Bulls Honda RBPT": "rb",
+    "Red Bull Racing Honda RBPT": "red_bull",
+    "Williams Mercedes": "williams",
+    # Misspellings found in the qualifying files
+    "Racing Honda RBPT": "rb",
+    "Kick Sauber": "sauber",
+}
+TEAM_CONSTRUCTORS_BY_KEY = {team.lower(): constructor_ref for team, constructor_ref in TEAM_CONSTRUCTORS.items()}
+
+# Values of the Time/Retired column that are not times, and their archive status
+RETIREMENTS = {"DNF": ("Retired", "R"), "DNS": ("Withdrew", "W"), "DSQ": ("Disqualified", "D")}
+
+def normalize_name(name):
+    '''
+    Lower case name without accents, so "Nico Hulkenberg" matches "Nico Hülkenberg"
+    '''
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+
+
+def _read_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(state):
+    os.makedirs(data.INGEST_DIR, exist_ok=True)
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def _read_ingested(name):
+    path = data.ingested_path(name)
+    return data.read_arrow(path) if os.path.exists(path) else None
+
+
+def _archive_table(name):
+    '''
+    Archive table without previously ingested rows
+    '''
+    df = data.read_snapshot(name, data._signature(data.table_path(name)))
+    return data._read_csv(name) if df is None else df
+
+
+def _digest(rows):
+    return hashlib.sha1(rows.to_csv(index=False).encode()).hexdigest()
+
+
+def pending_rounds(state):
+    '''
+    Rows of every round, per source file, that are new or changed since the
+    last ingest: {file name: {track: rows}}
+    '''
+    pending = {}
+    for file_name in SOURCES:
+        path = os.path.join(SEASON_2025_DIR, file_name)
+        if not os.path.exists(path):
+            continue
+        seen = state.get(file_name, {})
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False)
+        for track, track_rows in rows.groupby("Track", sort=False):
+            if seen.get(track) != _digest(track_rows):
+                pending[file_name] = {**pending.get(file_name, {}), track: track_rows.reset_index(drop=True)}
+    return pending
+
+
+class IdMapper:
+    '''
+    Resolves tracks, driver names and team strings to archive ids, creating
+    races and drivers that the archive does not have yet
+    '''
+
+    def __init__(self):
+        self.archive_races = _archive_table("races")
+        self.races = _read_ingested("races")
+        self.drivers = _read_ingested("drivers")
+        archive_drivers = _archive_table("drivers")
+        known_drivers = archive_drivers if self.drivers is None else pd.concat([archive_drivers, self.drivers])
+        self.driver_ids = {
+            normalize_name(f"{forename} {surname}"): int(driver_id)
+            for driver_id, forename, surname in zip(known_drivers["driverId"], known_drivers["forename"], known_drivers["surname"])
+        }
+        self.driver_refs = set(known_drivers["driverRef"])
+        self.next_driver_id = int(known_drivers["driverId"].max()) + 1
+
+        constructors = _archive_table("constructors")
+        self.constructor_ids = dict(zip(constructors["constructorRef"], constructors["constructorId"].astype(int)))
+        circuits = _archive_table("circuits")
+        self.circuit_ids = dict(zip(circuits["circuitRef"], circuits["circuitId"].astype(int)))
+        self.new_races = []
+        self.new_drivers = []
+
+    def archive_race_id(self, track):
+        '''
+        raceId of the round when the archive itself already covers it
+        '''
+        season_round = CALENDAR_2025[track][0]
+        match = self.archive_races[(self.archive_races["year"] == 2025) & (self.archive_races["round"] == season_round)]
+        return None if match.empty else int(match["raceId"].iloc[0])
+
+    def race_id(self, track):
+        if track not in CALENDAR_2025:
+            raise ValueError(f"Unknown 2025 track: {track}")
+        if self.races is not None and track in set(self.races["track"]):
+            return int(self.races.loc[self.races["track"] == track, "raceId"].iloc[0])
+        for race in self.new_races:
+            if race["track"] == track:
+                return race["raceId"]
+
+        season_round, circuit_ref, name, date, _ = CALENDAR_2025[track]
+        known = [self.archive_races["raceId"].max()]
+        known += [] if self.races is None else [self.races["raceId"].max()]
+        known += [race["raceId"] for race in self.new_races]
+        race_id = int(max(known)) + 1
+        self.new_races.append({
+            "raceId": race_id, "year": 2025, "round": season_round, "circuitId": self.circuit_ids[circuit_ref],
+            "name": name, "date": pd.Timestamp(date), "track": track,
+        })
+        return race_id
+
+    def constructor_id(self, team):
+        # The source files are not consistent about case ("Honda RBPT" / "Honda RBPt")
+        constructor_ref = TEAM_CONSTRUCTORS_BY_KEY.get(team.lower())
+        if constructor_ref is None:
+            raise ValueError(f"Unknown 2025 team: {team}")
+        return self.constructor_ids[constructor_ref]
+
+    def driver_id(self, name, number):
+        key = normalize_name(name)
+        if key not in self.driver_ids:
+            forename, surname = name.split(" ", 1)
+            driver_ref = normalize_name(surname).replace(" ", "_")
+            if driver_ref in self.driver_refs:
+                driver_ref = normalize_name(name).replace(" ", "_")
+            self.driver_ids[key] = self.next_driver_id
+            self.driver_refs.add(driver_ref)
+            self.new_drivers.append({
+                "driverId": self.next_driver_id, "driverRef": driver_ref, "number": int(number),
+                "code": normalize_name(surname)[:3].upper(), "forename": forename, "surname": surname,
+            })
+            self.next_driver_id += 1
+        return self.driver_ids[key]
+
+
+def _classification(rows):
+    '''
+    position, positionText and positionOrder from the Position column. Rows
+    are listed in finishing order, which is the archive's positionOrder.
+    '''
+    position = pd.to_numeric(rows["Position"], errors="coerce").astype("Int8")
+    retired = rows.get("Time/Retired", pd.Series("", index=rows.index))
+    position_text = position.astype("string")
+    position_text = position_text.fillna(retired.map(lambda value: RETIREMENTS.get(value, ("", "R"))[1]))
+    position_text = position_text.mask(rows["Position"] == "DQ", "D")
+    return position, position_text, pd.Series(range(1, len(rows) + 1), index=rows.index)
+
+
+def _statuses(rows, status_ids):
+    '''
+    statusId for every row of a race or sprint, from its Time/Retired value
+    '''
+    retired = rows["Time/Retired"]
+    laps_down = retired.str.extract(r"^\+(\d+) laps?$", expand=False)
+    names = pd.Series("Finished", index=rows.index)
+    names = names.mask(laps_down.notna(), "+" + laps_down.fillna("") + " Lap" + laps_down.map(lambda n: "" if n == "1" else "s"))
+    names = names.mask(retired.isin(RETIREMENTS), retired.map(lambda value: RETIREMENTS.get(value, ("",))[0]))
+    return names.map(status_ids).astype("Int16")
+
+
+def _race_rows(rows, race_id, ids, status_ids):
+    '''
+    Archive results rows for one race or sprint
+    '''
+    position, position_text, position_order = _classification(rows)
+    retired = rows["Time/Retired"]
+    winner_ms = data.time_to_ms(retired.iloc[:1]).iloc[0]
+    gap_ms = data.time_to_ms(retired.str.extract(r"^\+(\d[\d:.]*)$", expand=False))
+    milliseconds = data.time_to_ms(retired)
+    milliseconds = milliseconds.where(milliseconds.notna(), winner_ms + gap_ms) if pd.notna(winner_ms) else milliseconds
+    is_time = data.time_to_ms(retired).notna() | gap_ms.notna()
+
+    table = pd.DataFrame({
+        "raceId": race_id,
+        "driverId": [ids.driver_id(name, number) for name, number in zip(rows["Driver"], rows["No"])],
+        "constructorId": rows["Team"].map(ids.constructor_id),
+        "number": pd.to_numeric(rows["No"]),
+        "grid": pd.to_numeric(rows["Starting Grid"], errors="coerce"),
+        "position": position,
+        "positionText": position_text,
+        "positionOrder": position_order,
+        "points": pd.to_numeric(rows["Points"]).astype(float),
+        "laps": pd.to_numeric(rows["Laps"]),
+        "time": retired.where(is_time),
+        "milliseconds": milliseconds,
+        "statusId": _statuses(rows, status_ids),
+    })
+    if "Fastest Lap Time" in rows:
+        fastest_ms = data.time_to_ms(rows["Fastest Lap Time"])
+        table["fastestLapTime"] = rows["Fastest Lap Time"].where(fastest_ms.notna())
+        table["rank"] = fastest_ms.astype("float64").rank(method="min").astype("Int8")
+    return table
+
+
+def _qualifying_rows(rows, race_id, ids):
+    '''
+    Archive qualifying rows for one race
+    '''
+    position, _, position_order = _classification(rows)
+    table = pd.DataFrame({
+        "raceId": race_id,
+        "driverId": [ids.driver_id(name, number) for name, number in zip(rows["Driver"], rows["No"])],
+        "constructorId": rows["Team"].map(ids.constructor_id),
+        "number": pd.to_numeric(rows["No"]),
+        "position": position.fillna(position_order.astype("Int8")),
+    })
+    for column in ["Q1", "Q2", "Q3"]:
+        times = rows.get(column, pd.Series(pd.NA, index=rows.index)).replace("", pd.NA)
+        table[column.lower()] = times.where(data.time_to_ms(times).notna())
+    return table
+
+
+def _store(name, new_rows, replaced_race_ids, id_column=None):
+    '''
+    Append normalized rows to an ingested table, replacing earlier rows for
+    any race that was ingested again
+    '''
+    existing = _read_ingested(name)
+    if existing is not None and replaced_race_ids and "raceId" in existing:
+        existing = existing[~existing["raceId"].isin(replaced_race_ids)]
+    frames = [frame for frame in [existing, new_rows] if frame is not None and not frame.empty]
+    if not frames:
+        return 0
+    table = pd.concat(frames, ignore_index=True)
+    if id_column is not None:
+        start = int(_archive_table(name)[id_column].max()) + 1
+        table[id_column] = range(start, start + len(table))
+    data.write_arrow(data.ingested_path(name), table)
+    return len(new_rows) if new_rows is not None else 0
+
+
+def ingest():
+    '''
+    Normalize new or changed 2025 rounds into the archive schema and append
+    them to the ingested tables. Rounds already ingested, or already in the
+    archive, are skipped, so adding one round only processes that round.
+    Returns {table: rows written}.
+    '''
+    state = _read_state()
+    pending = pending_rounds(state)
+    if not pending:
+        return {}
+
+    ids = IdMapper()
+    status = _archive_table("status")
+    status_ids = dict(zip(status["status"].astype(str), status["statusId"].astype(int)))
+    normalized = {table: [] for table in SOURCES.values()}
+    replaced = {table: [] for table in SOURCES.values()}
+    for file_name, rounds in pending.items():
+        table = SOURCES[file_name]
+        for track, rows in rounds.items():
+            state.setdefault(file_name, {})[track] = _digest(rows)
+            if ids.archive_race_id(track) is not None:
+                continue
+            race_id = ids.race_id(track)
+            replaced[table].append(race_id)
+            if table == "qualifying":
+                normalized[table].append(_qualifying_rows(rows, race_id, ids))
+            else:
+                normalized[table].append(_race_rows(rows, race_id, ids, status_ids))
+
+    written = {}
+    id_columns = {"results": "resultId", "sprint_results": "resultId", "qualifying": "qualifyId"}
+    for table, frames in normalized.items():
+        if frames:
+            written[table] = _store(table, pd.concat(frames, ignore_index=True), replaced[table], id_columns[table])
+    if ids.new_races:
+        written["races"] = _store("races", pd.DataFrame(ids.new_races), [])
+    if ids.new_drivers:
+        written["drivers"] = _store("drivers", pd.DataFrame(ids.new_drivers), [])
+    _write_state(state)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize the 2025 dataset into the archive schema")
+    parser.add_argument("--rebuild", action="store_true", help="Discard ingested rows and ingest every round again")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.isdir(data.INGEST_DIR):
+        for file_name in os.listdir(data.INGEST_DIR):
+            os.remove(os.path.join(data.INGEST_DIR, file_name))
+    written = ingest()
+    if not written:
+        print("Nothing new to ingest")
+    for table, rows in written.items():
+        print(f"{table}: {rows} rows -> {data.ingested_path(table)}")
+    if written and os.path.exists(data.MANIFEST_PATH):
+        # Refresh the persisted summary cube now rather than on the app's first render
+        data.write_season_summary()
+        print("Rebuilt the season summary in the snapshot")
+
+
+if __name__ == "__main__":
+    main()
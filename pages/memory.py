@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+import types
+import numpy as np
+import pandas as pd
+import data
+import figures
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Sessions that have not rerun for this long are left out of the per-session view
+SESSION_TTL_S = 30 * 60
+
+# Session id -> (bytes of its session state, time of its last rerun)
+_sessions = {}
+_lock = threading.Lock()
+
+
+def deep_size(obj, seen=None):
+    '''
+    Bytes held by obj and everything it references. Objects reachable more
+    than once are counted once.
+    '''
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def shared_usage():
+    '''
+    Bytes of everything held once per process and shared by every session:
+    the tables, the derived tables and the figure cache
+    '''
+    seen = set()
+    rows = [
+        {"kind": kind, "name": name, "bytes": deep_size(obj, seen)}
+        for kind, name, obj in data.shared_objects()
+    ]
+    rows.append({"kind": "cache", "name": "figures", "bytes": figures.cache_stats()["bytes"]})
+    return pd.DataFrame(rows, columns=["kind", "name", "bytes"])
+
+
+def record_session(state):
+    '''
+    Remember how many bytes the current session's state holds. Called at the
+    end of every rerun, so the view can account for every active session.
+    '''
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    size = deep_size(state)
+    with _lock:
+        _sessions[ctx.session_id] = (size, time.time())
+
+
+def session_usage():
+    '''
+    Bytes of session state for every session that reran within SESSION_TTL_S
+    '''
+    cutoff = time.time() - SESSION_TTL_S
+    with _lock:
+        for session_id in [sid for sid, (_, seen) in _sessions.items() if seen < cutoff]:
+            del _sessions[session_id]
+        return [size for size, _ in _sessions.values()]
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def show_memory(container, state):
+    '''
+    Shared and per-session memory of this server process, to size containers
+    '''
+    shared = shared_usage()
+    sessions = session_usage()
+    this_session = deep_size(state)
+    container.caption(f"Shared by every session: {shared['bytes'].sum() / 1024 / 1024:.1f} MB")
+    container.dataframe(
+        pd.DataFrame({
+            "Kind": shared["kind"],
+            "Name": shared["name"],
+            "MB": (shared["bytes"] / 1024 / 1024).round(2),
+        }).sort_values("MB", ascending=False),
+        hide_index=True,
+        use_container_width=True
+    )
+    if sessions:
+        container.caption(
+            f"This session: {this_session / 1024:.1f} KB. {len(sessions)} sessions active in the last "
+            f"{SESSION_TTL_S // 60} minutes hold {sum(sessions) / 1024:.1f} KB "
+            f"({sum(sessions) / len(sessions) / 1024:.1f} KB each on average, {max(sessions) / 1024:.1f} KB at most)"
+        )
+    else:
+        container.caption(f"This session: {this_session / 1024:.1f} KB")
+    peak = peak_rss_bytes()
+    if peak is not None:
+        container.caption(f"Process peak RSS: {peak / 1024 / 1024:.0f} MB")
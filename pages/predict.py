@@ -1 +1,79 @@
-import streamlit as st
\ No newline at end of file
+import streamlit as st
+import os
+import sys
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prediction-model")
+
+def get_train_model():
+    '''
+    Import the training module on first use so the other pages never pay for scikit-learn
+    '''
+    if MODEL_DIR not in sys.path:
+        sys.path.append(MODEL_DIR)
+    import train_model
+    return train_model
+
+# A missing model is not kept, so a model trained later is picked up on the next rerun
+@st.cache_resource(show_spinner="Loading prediction model...", validate=lambda model: model is not None)
+def get_model(fingerprint):
+    '''
+    The saved champion model for the current data, kept for the life of the server,
+    or None when it is missing or was trained on other data. The app never trains it.
+    Keyed by the data fingerprint so a data change loads a new model.
+    '''
+    train_model = get_train_model()
+    return train_model.load_saved_model()
+
+@st.cache_data(show_spinner=False)
+def get_predictions(fingerprint):
+    '''
+    2025 championship probabilities for the current data
+    '''
+    train_model = get_train_model()
+    return train_model.predict_2025_champion(get_model(fingerprint))
+
+def show_predict_page():
+    st.header("2025 World Champion Prediction")
+    fingerprint = get_train_model().data_fingerprint()
+    if get_model(fingerprint) is None:
+        st.warning("The prediction model is missing or out of date. Train it with `python prediction-model/train_model.py`.")
+        return
+    predictions = get_predictions(fingerprint)
+    if predictions.empty:
+        st.info("No 2025 results to predict from.")
+        return
+
+    rounds_completed = int(predictions["rounds_completed"].iloc[0])
+    st.caption(f"Based on the standings after round {rounds_completed} of the 2025 season.")
+
+    leader = predictions.iloc[0]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Predicted Champion", leader["Driver"])
+    col2.metric("Championship Probability", f"{leader['probability']:.0%}")
+    col3.metric("Current Points", int(leader["total_points"]))
+
+    contenders = predictions[predictions["probability"] > 0]
+    import plotly.express as px
+    fig = px.bar(
+        contenders,
+        x="Driver",
+        y="probability",
+        color="Team",
+        labels={"probability": "Championship Probability", "Driver": "Driver"},
+        title="Championship Probability by Driver"
+    )
+    fig.update_layout(yaxis=dict(tickformat=".0%"))
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = predictions[["Driver", "Team", "total_points", "total_wins", "total_podiums", "gap_to_leader", "probability"]]
+    st.dataframe(
+        table.rename(columns={
+            "total_points": "Points",
+            "total_wins": "Wins",
+            "total_podiums": "Podiums",
+            "gap_to_leader": "Gap to Leader",
+            "probability": "Probability"
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
@@ -0,0 +1,147 @@
+import logging
+import os
+import queue
+import threading
+import time
+import memory
+
+# Background threads that build likely-next views (PREFETCH_WORKERS=0 turns
+# prefetch off), and the most jobs that can wait for them. Jobs beyond that
+# are dropped rather than queued.
+WORKERS = int(os.environ.get("PREFETCH_WORKERS", 2))
+MAX_PENDING = 16
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    '''
+    Daemon worker threads running jobs from a bounded queue. Every job belongs
+    to an owner (a session): scheduling new jobs for an owner, or cancelling
+    it, skips whatever that owner still has waiting. Owners that have not
+    scheduled or cancelled anything for memory.SESSION_TTL_S are forgotten.
+    '''
+
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING):
+        self.workers = workers
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.stats = {"scheduled": 0, "done": 0, "cancelled": 0, "dropped": 0, "failed": 0}
+        # Owner -> (generation of its current jobs, time it last scheduled or cancelled)
+        self._generations = {}
+        self._last_generation = 0
+        self._threads = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+    def _start(self):
+        # Threads start with the first job, so importing the module is free
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"prefetch-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def schedule(self, owner, jobs):
+        '''
+        Queue jobs (callables) for owner in place of any it has waiting.
+        Returns how many were queued; the rest are dropped when the queue is full.
+        '''
+        if self.workers == 0:
+            return 0
+        with self._lock:
+            generation = self._advance(owner)
+            self._start()
+        queued = 0
+        for job in jobs:
+            with self._lock:
+                try:
+                    self.jobs.put_nowait((owner, generation, job))
+                except queue.Full:
+                    self.stats["dropped"] += len(jobs) - queued
+                    break
+                self._pending += 1
+                self.stats["scheduled"] += 1
+            queued += 1
+        return queued
+
+    def cancel(self, owner):
+        with self._lock:
+            self._advance(owner)
+
+    def _advance(self, owner):
+        # Generations are unique across owners, so a forgotten owner's old
+        # jobs can never match the generation it gets when it comes back
+        now = time.time()
+        cutoff = now - memory.SESSION_TTL_S
+        for stale in [o for o, (_, seen) in self._generations.items() if seen < cutoff]:
+            del self._generations[stale]
+        self._last_generation += 1
+        self._generations[owner] = (self._last_generation, now)
+        return self._last_generation
+
+    def counts(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def wait(self, timeout=None):
+        '''
+        Block until every queued job has run or been skipped. Returns False on timeout.
+        '''
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _work(self):
+        while True:
+            owner, generation, job = self.jobs.get()
+            with self._lock:
+                current = self._generations.get(owner, (None,))[0] == generation
+            outcome = "cancelled"
+            if current:
+                try:
+                    job()
+                    outcome = "done"
+                except Exception:
+                    logger.exception("Prefetch job failed")
+                    outcome = "failed"
+            with self._idle:
+                self.stats[outcome] += 1
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+
+_prefetcher = Prefetcher()
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def schedule(jobs):
+    '''
+    Run jobs in the background for the current session, cancelling the jobs
+    it still has waiting from an earlier selection
+    '''
+    return _prefetcher.schedule(_session_id(), jobs)
+
+
+def cancel():
+    _prefetcher.cancel(_session_id())
+
+
+def wait(timeout=None):
+    return _prefetcher.wait(timeout)
+
+
+def prefetch_stats():
+    return _prefetcher.counts()
+
+
+def show_stats(container):
+    stats = prefetch_stats()
+    container.caption(
+        f"Prefetch: {stats['done']} views built, {stats['cancelled']} cancelled, "
+        f"{stats['dropped']} dropped, {stats['failed']} failed"
+    )
@@ -0,0 +1,170 @@
+import contextlib
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+import data
+
+# Every rerun with timings enabled is appended here, one span per line
+LOG_PATH = os.path.join(data.BASE_DIR, "profiles", "spans.jsonl")
+
+# Span names shared by all the analysis functions, in pipeline order
+STAGES = ["load", "filter", "aggregate", "chart", "render"]
+
+# Each Streamlit session reruns its script on its own thread, so the recorder
+# is per thread. With no recorder a span is a shared no-op context manager.
+_local = threading.local()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class Recorder:
+    '''
+    Spans recorded during one rerun of the app
+    '''
+
+    def __init__(self, page):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.page = page
+        self.started = time.perf_counter()
+        self.timestamp = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.stack = []
+        self.spans = []
+
+    def records(self):
+        '''
+        The finished spans as dicts, in the order they started
+        '''
+        return sorted(self.spans, key=lambda span: span["start_ms"])
+
+
+class Span:
+    __slots__ = ("recorder", "name", "path", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        stack = self.recorder.stack
+        self.path = f"{stack[-1]}/{self.name}" if stack else self.name
+        stack.append(self.path)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        recorder = self.recorder
+        recorder.stack.pop()
+        recorder.spans.append({
+            "name": self.name,
+            "path": self.path,
+            "depth": self.path.count("/"),
+            "start_ms": (self.start - recorder.started) * 1000,
+            "duration_ms": (end - self.start) * 1000,
+        })
+        return False
+
+
+def start(enabled, page=None):
+    '''
+    Begin a rerun: record spans from here on if enabled, otherwise make every span a no-op
+    '''
+    _local.recorder = Recorder(page) if enabled else None
+
+
+def enabled():
+    return getattr(_local, "recorder", None) is not None
+
+
+def span(name):
+    '''
+    Context manager timing the block as a child of the enclosing span
+    '''
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        return _NULL_SPAN
+    return Span(recorder, name)
+
+
+def traced(func):
+    '''
+    Decorator recording each call of func as a span named after it
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = getattr(_local, "recorder", None)
+        if recorder is None:
+            return func(*args, **kwargs)
+        with Span(recorder, func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def finish(log_path=LOG_PATH):
+    '''
+    End the rerun, append its spans to the JSON-lines log and return the recorder
+    (None when timings are disabled)
+    '''
+    recorder = getattr(_local, "recorder", None)
+    _local.recorder = None
+    if recorder is None:
+        return None
+    records = recorder.records()
+    if records and log_path:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "a") as f:
+            for record in records:
+                f.write(json.dumps({
+                    "run": recorder.run_id,
+                    "time": recorder.timestamp,
+                    "page": recorder.page,
+                    **record,
+                    "start_ms": round(record["start_ms"], 3),
+                    "duration_ms": round(record["duration_ms"], 3),
+                }) + "\n")
+    return recorder
+
+
+def stage_totals(records):
+    '''
+    Time spent in each stage over all analysis functions, in milliseconds
+    '''
+    totals = dict.fromkeys(STAGES, 0.0)
+    for record in records:
+        if record["name"] in totals:
+            totals[record["name"]] += record["duration_ms"]
+    return totals
+
+
+def show_timings(container, recorder):
+    '''
+    Per-rerun breakdown of the recorded spans
+    '''
+    if recorder is None:
+        return
+    records = recorder.records()
+    if not records:
+        container.caption("No spans recorded on this page.")
+        return
+
+    total_ms = sum(record["duration_ms"] for record in records if record["depth"] == 0)
+    container.caption(f"Rerun {recorder.run_id}: {total_ms:.1f} ms in traced code")
+    totals = stage_totals(records)
+    container.dataframe(
+        pd.DataFrame({"Stage": list(totals), "ms": [round(ms, 1) for ms in totals.values()]}),
+        hide_index=True,
+        use_container_width=True
+    )
+    container.expander("All spans").dataframe(
+        pd.DataFrame({
+            "Span": [record["path"] for record in records],
+            "ms": [round(record["duration_ms"], 1) for record in records],
+        }),
+        hide_index=True,
+        use_container_width=True
+    )
+    container.caption(f"Spans are appended to {os.path.relpath(LOG_PATH, data.BASE_DIR)}")
@@ -0,0 +1,196 @@
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pandas as pd
+import analysis
+import data
+
+REPORT_DIR = os.path.join(data.BASE_DIR, "reports")
+KINDS = ["driver", "team"]
+
+# The primary color the pages use for the selected driver or team
+COLOR = "#1f77b4"
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>body {{ font-family: sans-serif; margin: 2em; }} td, th {{ padding: 4px 12px; text-align: left; }}</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>{rows}</table>
+{figures}
+</body>
+</html>
+"""
+
+
+def warm_worker():
+    '''
+    Load every table and derived table the reports use. Runs once per worker
+    process; with fork the workers inherit what the parent already loaded.
+    '''
+    data.race_calendar()
+    data.driver_index()
+    data.constructor_index()
+    data.driver_points_ledger()
+    data.constructor_points_ledger()
+    data.load_table("qualifying")
+    data.load_table("results")
+    data.pit_stop_facts()
+    data.team_pit_stop_summary()
+    data.season_summary()
+
+
+def report_grid(seasons=None, kinds=KINDS):
+    '''
+    (kind, entity id, season) for every driver and team that raced in each season
+    '''
+    facts = data.race_facts()
+    if seasons:
+        facts = facts[facts["year"].isin(seasons)]
+    tasks = []
+    for kind in kinds:
+        id_column = "driverId" if kind == "driver" else "constructorId"
+        pairs = facts[["year", id_column]].drop_duplicates().sort_values(["year", id_column])
+        tasks += [(kind, int(entity_id), int(season)) for season, entity_id in zip(pairs["year"], pairs[id_column])]
+    return tasks
+
+
+def _plain(value, digits=3):
+    '''
+    A stat as a plain Python number for the summary, None when missing
+    '''
+    if value is None or pd.isna(value):
+        return None
+    return int(value) if digits == 0 else round(float(value), digits)
+
+
+def driver_report(driver_id, season):
+    races = data.race_calendar().races_in(season=season)
+    record = data.driver_index().record(driver_id)
+    label = data.driver_index().name_of(driver_id)
+    labels, colors = {driver_id: label}, {label: COLOR}
+
+    points, [points_stats] = analysis.driver_points(labels, races, season)
+    qualifying, [qualifying_stats] = analysis.driver_qualifying(labels, races, season)
+    counts, finishing_stats = analysis.driver_finishing(labels, races, season)
+
+    figures = []
+    if points is not None:
+        figures.append(analysis.driver_points_figure(points, colors))
+    if not qualifying.empty:
+        figures.append(analysis.driver_qualifying_figure(qualifying, colors))
+    if counts is not None:
+        figures.append(analysis.driver_finishing_figure(counts, colors))
+    stats = {
+        "total_points": _plain(points_stats["total_points"]),
+        "best_finish": _plain(points_stats["best_finish"], 0),
+        "avg_points": _plain(points_stats["avg_points"], 2),
+        "best_qualifying": _plain(qualifying_stats["best_qualifying"], 0),
+        "avg_qualifying": _plain(qualifying_stats["avg_qualifying"], 2),
+        "pole_positions": qualifying_stats["pole_positions"],
+        "avg_finish": _plain(finishing_stats[0]["avg_finish"], 2) if finishing_stats else None,
+    }
+    return label, record["driverRef"], stats, figures
+
+
+def team_report(constructor_id, season):
+    races = data.race_calendar().races_in(season=season)
+    record = data.constructor_index().record(constructor_id)
+    label = data.constructor_index().name_of(constructor_id)
+    labels, colors = {constructor_id: label}, {label: COLOR}
+
+    series, [points_stats] = analysis.team_points(labels, races, season)
+    stops, pit_stats = analysis.team_pit_stops(labels, races, season)
+
+    figures = [analysis.team_points_figure(series, colors)]
+    if not stops.empty:
+        figures.append(analysis.team_pit_stops_figure(stops))
+    pit = pit_stats[0] if pit_stats else {}
+    stats = {
+        "total_points": _plain(points_stats["total_points"]),
+        "best_finish": _plain(points_stats["best_finish"], 0),
+        "avg_points": _plain(points_stats["avg_points"], 2),
+        "pit_stops": pit.get("count", 0),
+        "mean_pit_stop_s": _plain(pit.get("mean")),
+        "best_pit_stop_s": _plain(pit.get("best")),
+        "worst_pit_stop_s": _plain(pit.get("worst")),
+    }
+    return label, record["constructorRef"], stats, figures
+
+
+def write_report(path, title, stats, figures, plotly_js):
+    rows = "".join(
+        f"<tr><th>{html.escape(name.replace('_', ' ').capitalize())}</th><td>{'-' if value is None else value}</td></tr>"
+        for name, value in stats.items()
+    )
+    body = "\n".join(fig.to_html(full_html=False, include_plotlyjs=False) for fig in figures)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PAGE.format(title=html.escape(title), plotly_js=plotly_js, rows=rows, figures=body))
+
+
+def render_report(kind, entity_id, season, output_dir):
+    '''
+    Write the HTML report for one driver or team in one season and return its summary row
+    '''
+    build = driver_report if kind == "driver" else team_report
+    label, ref, stats, figures = build(entity_id, season)
+    path = os.path.join(output_dir, str(season), f"{kind}s", f"{ref}.html")
+    # Every report shares one copy of plotly.js at the top of the output directory
+    write_report(path, f"{label}: {season} season", stats, figures, "../../plotly.min.js")
+    return {"kind": kind, "season": season, "id": entity_id, "name": label,
+            "report": os.path.relpath(path, output_dir), **stats}
+
+
+def generate_reports(output_dir=REPORT_DIR, seasons=None, kinds=KINDS, workers=None):
+    '''
+    Render every (entity, season) report across a process pool and write the
+    summary stats of each kind. Returns every summary row as a DataFrame.
+    '''
+    from plotly.offline import get_plotlyjs
+    warm_worker()
+    tasks = report_grid(seasons, kinds)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "plotly.min.js"), "w", encoding="utf-8") as f:
+        f.write(get_plotlyjs())
+
+    task_kinds, entity_ids, task_seasons = zip(*tasks) if tasks else ((), (), ())
+    if workers == 1 or len(tasks) <= 1:
+        rows = list(map(render_report, task_kinds, entity_ids, task_seasons, repeat(output_dir)))
+    else:
+        # Chunks amortize the round trip to the workers over several reports
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm_worker) as pool:
+            rows = list(pool.map(render_report, task_kinds, entity_ids, task_seasons, repeat(output_dir), chunksize=chunksize))
+
+    # One summary per kind, since drivers and teams have different stats
+    for kind in kinds:
+        kind_rows = [row for row in rows if row["kind"] == kind]
+        if kind_rows:
+            pd.DataFrame(kind_rows).drop(columns="kind").to_csv(os.path.join(output_dir, f"{kind}s.csv"), index=False)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static driver and team reports for every season")
+    parser.add_argument("--output", default=REPORT_DIR, help="output directory")
+    parser.add_argument("--season", type=int, action="append", help="season to report (default: every season)")
+    parser.add_argument("--kind", choices=KINDS, action="append", help="driver or team reports (default: both)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to all cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = generate_reports(args.output, args.season, args.kind or KINDS, args.workers)
+    print(f"Wrote {len(summary)} reports to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
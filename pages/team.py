@@ -1,83 +1,69 @@
 import datetime
+import functools
 import streamlit as st
-import sys
-import os
-import pandas as pd
-import plotly.express as px
-
-# Load races.csv to find the last race date of 2024
-def get_last_2024_race_date():
-    races = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive", "races.csv"))
-    races_2024 = races[races['year'] == 2024]
-    races_2024['date'] = pd.to_datetime(races_2024['date'])
-    last_date = races_2024['date'].max().date()
-    return last_date
-
-LAST_2024_RACE_DATE = get_last_2024_race_date()
-today = datetime.date.today()
+import analysis
+import data
+import figures
+import prefetch
+import profiling
 
 # Show filters for team analysis
 def show_filters_team():
     with st.expander("Show/Hide Filters", expanded=True):
         # --- Team Comparison Toggle and Options ---
         st.session_state.setdefault("enable_team_comparison", False)
-        st.session_state.setdefault("compare_team_name", None)
+        st.session_state.setdefault("compare_team_names", [])
         st.session_state.setdefault("team_color", "#1f77b4")
-        st.session_state.setdefault("compare_team_color", "#ff7f0e")
         enable_comparison = st.checkbox("Enable Team Comparison", value=st.session_state["enable_team_comparison"])
         st.session_state["enable_team_comparison"] = enable_comparison
 
         # Color pickers for main and comparison team
         st.session_state["team_color"] = st.color_picker("Primary Team Color", st.session_state["team_color"])
         if enable_comparison:
-            # Only include teams who raced between 2018-2024
-            BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            DATA_DIR = os.path.join(BASE_DIR, "archive")
-            constructors = pd.read_csv(os.path.join(DATA_DIR, "constructors.csv"))
-            results = pd.read_csv(os.path.join(DATA_DIR, "results.csv"))
-            races = pd.read_csv(os.path.join(DATA_DIR, "races.csv"))
-            races_range = races[(races['year'] >= 2018) & (races['year'] <= 2024)]
-            race_ids = races_range['raceId'].unique()
-            results_range = results[results['raceId'].isin(race_ids)]
-            active_team_ids = results_range['constructorId'].unique()
-            filtered_teams = constructors[constructors['constructorId'].isin(active_team_ids)]
-            team_names = filtered_teams['name'].tolist()
+            # Include every team that has raced in any season
+            results = data.load_table("results")
+            active_team_ids = results['constructorId'].unique()
+            constructor_index = data.constructor_index()
+            team_names = [constructor_index.name_of(team_id) for team_id in active_team_ids]
             # Remove the selected team from the comparison list
             selected_team = st.session_state.get("selected_team_name")
             if selected_team in team_names:
                 team_names.remove(selected_team)
-            st.selectbox("Select Team to Compare", [None] + sorted(team_names), key="compare_team_name")
-            st.session_state["compare_team_color"] = st.color_picker("Comparison Team Color", st.session_state["compare_team_color"])
+            team_names = sorted(team_names)
+            st.session_state["compare_team_names"] = [name for name in st.session_state["compare_team_names"] if name in team_names]
+            st.multiselect("Select Teams to Compare", team_names, key="compare_team_names")
+            for i, compare_team in enumerate(st.session_state["compare_team_names"]):
+                color_key = f"compare_team_color_{compare_team}"
+                st.session_state.setdefault(color_key, analysis.COMPARE_COLORS[i % len(analysis.COMPARE_COLORS)])
+                st.color_picker(f"Comparison Team Color ({compare_team})", key=color_key)
 
         timeframe = st.segmented_control(
             "Select a timeframe format", ["Race Season", "Custom Timeframe"]
         )
 
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        DATA_DIR = os.path.join(BASE_DIR, "archive")
-        races = pd.read_csv(os.path.join(DATA_DIR, "races.csv"))
-
         if timeframe == "Custom Timeframe":
-            start_default, end_default = st.session_state.get("custom_timeframe", (datetime.date(2024,2,1), LAST_2024_RACE_DATE))
-            if start_default < datetime.date(2018, 1, 1):
-                start_default = datetime.date(2018, 1, 1)
-            if end_default > LAST_2024_RACE_DATE:
-                end_default = LAST_2024_RACE_DATE
+            first_race_date = data.first_race_date()
+            last_race_date = data.last_race_date()
+            start_default, end_default = st.session_state.get("custom_timeframe", (datetime.date(2024,2,1), last_race_date))
+            if start_default < first_race_date:
+                start_default = first_race_date
+            if end_default > last_race_date:
+                end_default = last_race_date
             if end_default < start_default:
                 end_default = start_default
 
             start_date = st.date_input(
                 "Start Date",
                 value=start_default,
-                min_value=datetime.date(2018, 1, 1),
-                max_value=LAST_2024_RACE_DATE,
+                min_value=first_race_date,
+                max_value=last_race_date,
                 key="team_start_date"
             )
             end_date = st.date_input(
                 "End Date",
                 value=end_default,
                 min_value=start_date,
-                max_value=LAST_2024_RACE_DATE,
+                max_value=last_race_date,
                 key="team_end_date"
             )
 
@@ -85,14 +71,10 @@ def show_filters_team():
                 st.session_state["custom_timeframe"] = (start_date, end_date)
                 st.session_state["custom_timeframe_selected"] = True
                 st.session_state["race_season_selected"] = False
-                # Compute and store race_ids for this timeframe
-                races["date"] = pd.to_datetime(races["date"])
-                races_in_timeframe = races[(races["date"] >= pd.to_datetime(start_date)) & (races["date"] <= pd.to_datetime(end_date))]
-                st.session_state["race_ids"] = races_in_timeframe["raceId"].unique()
 
         elif timeframe == "Race Season":
-            # Only show seasons the selected team has raced in (2018-2024)
-            season_options = [2024, 2023, 2022, 2021, 2020, 2019, 2018]
+            # Show every season in the archive
+            season_options = sorted({int(year) for year in data.race_calendar().years}, reverse=True)
             season_choice = st.selectbox(
                 "Select Season:", season_options,
                 key="team_season_choice"
@@ -101,108 +83,41 @@ def show_filters_team():
                 st.session_state["race_season"] = season_choice
                 st.session_state["race_season_selected"] = True
                 st.session_state["custom_timeframe_selected"] = False
-                # Compute and store race_ids for this season
-                races_in_timeframe = races[races["year"] == season_choice]
-                st.session_state["race_ids"] = races_in_timeframe["raceId"].unique()
 
-def team_points_analysis():
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    DATA_DIR = os.path.join(BASE_DIR, "archive")
-    results = pd.read_csv(os.path.join(DATA_DIR, "results.csv"))
-    races = pd.read_csv(os.path.join(DATA_DIR, "races.csv"))
-    constructors = pd.read_csv(os.path.join(DATA_DIR, "constructors.csv"))
-    try:
-        sprint_results = pd.read_csv(os.path.join(DATA_DIR, "sprint_results.csv"))
-    except Exception:
-        sprint_results = pd.DataFrame(columns=results.columns)
-
-    # Get selected teams from session state
+def get_teams_to_plot():
+    '''
+    The selected team followed by every comparison team, each with its id and color
+    '''
+    constructor_index = data.constructor_index()
     selected_team = st.session_state.get("selected_team_name")
-    compare_team = st.session_state.get("compare_team_name") if st.session_state.get("enable_team_comparison") else None
-    team_colors = {
-        selected_team: st.session_state.get("team_color", "#1f77b4"),
-    }
-    if compare_team:
-        team_colors[compare_team] = st.session_state.get("compare_team_color", "#ff7f0e")
-
-    #  list of teams to plot
-    teams_to_plot = [selected_team]
-    if compare_team:
-        teams_to_plot.append(compare_team)
+    teams_to_plot = [{"team": selected_team, "color": st.session_state.get("team_color", "#1f77b4")}]
+    if st.session_state.get("enable_team_comparison"):
+        for i, compare_team in enumerate(st.session_state.get("compare_team_names", [])):
+            color = st.session_state.get(f"compare_team_color_{compare_team}", analysis.COMPARE_COLORS[i % len(analysis.COMPARE_COLORS)])
+            teams_to_plot.append({"team": compare_team, "color": color})
+    for t in teams_to_plot:
+        t["id"] = constructor_index.id_of(t["team"])
+    return [t for t in teams_to_plot if t["team"]]
 
-    # Timeframe 
-    if st.session_state.get("custom_timeframe_selected", False):
-        start_date, end_date = st.session_state["custom_timeframe"]
-        races["date"] = pd.to_datetime(races["date"])
-        races_in_timeframe = races[(races["date"] >= pd.to_datetime(start_date)) & (races["date"] <= pd.to_datetime(end_date))]
-    else:
-        season = st.session_state.get("race_season", 2024)
-        races_in_timeframe = races[races["year"] == season]
-    race_ids = races_in_timeframe["raceId"].unique()
+@profiling.traced
+def team_points_analysis():
+    # Get selected teams from session state
+    teams_to_plot = get_teams_to_plot()
+    labels = {t["id"]: t["team"] for t in teams_to_plot}
+    colors = {t["team"]: t["color"] for t in teams_to_plot}
 
-    import plotly.graph_objects as go
-    stats = []
-    fig = go.Figure()
-    # Ensure all teams use the same x-axis 
-    x_dates = races_in_timeframe["date"]
-    for team_name in teams_to_plot:
-        if not team_name:
-            continue
-        team_row = constructors[constructors['name'] == team_name]
-        if team_row.empty:
-            merged = races_in_timeframe[["raceId", "date", "name", "year"]].copy()
-            merged["points"] = 0
-            merged["accum_points"] = 0
-        else:
-            team_id = team_row.iloc[0]['constructorId']
-            try:
-                team_id = int(team_id)
-            except Exception:
-                pass
-            team_results = results[(results["constructorId"].astype(int) == team_id) & (results["raceId"].isin(race_ids))]
-            team_sprint_results = sprint_results[(sprint_results["constructorId"].astype(int) == team_id) & (sprint_results["raceId"].isin(race_ids))]
-            common_cols = [col for col in team_results.columns if col in team_sprint_results.columns]
-            all_results = pd.concat([team_results[common_cols], team_sprint_results[common_cols]], ignore_index=True)
-            grouped = all_results.groupby("raceId", as_index=False).agg({
-                "points": "sum",
-                "positionOrder": "min"  # best finish for the team in each race
-            })
-            merged = races_in_timeframe[["raceId", "date", "name", "year"]].merge(grouped, on="raceId", how="left")
-            merged = merged.sort_values("date")
-            merged["points"] = merged["points"].fillna(0)
-            merged["accum_points"] = merged["points"].cumsum()
-            merged["positionOrder"] = merged["positionOrder"].replace(0, pd.NA)
-        fig.add_scatter(
-            x=merged["date"],
-            y=merged["accum_points"],
-            mode="lines+markers",
-            name=team_name,
-            line=dict(color=team_colors[team_name])
-        )
+    with profiling.span("filter"):
+        races_in_timeframe = analysis.selected_races(st.session_state)
 
-        # Get best finish
-        if "positionOrder" in merged.columns and merged["positionOrder"].notna().any():
-            best_finish = int(merged["positionOrder"].min())
-        else:
-            best_finish = None
-        stats.append({
-            "label": team_name,
-            "total_points": merged["points"].sum(),
-            "avg_points": merged["points"].mean(),
-            "best_finish": best_finish
-        })
+    series, stats = analysis.team_points(labels, races_in_timeframe, season=analysis.selected_season(st.session_state))
     if len(stats) > 0:
-        fig.update_layout(
-            xaxis=dict(tickformat="%Y-%m-%d"),
-            title="Accumulated Team Points Over Time",
-            xaxis_title="Race Date",
-            yaxis_title="Accumulated Points"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = figures.cached("team_points", labels, races_in_timeframe, colors,
+                             lambda: analysis.team_points_figure(series, colors))
+        with profiling.span("render"):
+            st.plotly_chart(fig, use_container_width=True)
 
         # Show stats for each team, with delta if comparison enabled
-        if len(stats) == 2:
-            s1, s2 = stats[0], stats[1]
+        if len(stats) >= 2:
             col1, col2, col3 = st.columns(3)
             def percent_delta(a, b):
                 if b == 0:
@@ -210,14 +125,6 @@ def team_points_analysis():
                 if a == b:
                     return "="
                 return f"{round((a-b)/b*100, 1)}%"
-            # Total Points
-            delta1 = percent_delta(s1["total_points"], s2["total_points"])
-            delta2 = percent_delta(s2["total_points"], s1["total_points"])
-            col1.metric(f"Total Points ({s1['label']})", s1["total_points"], delta=delta1)
-            col1.metric(f"Total Points ({s2['label']})", s2["total_points"], delta=delta2)
-            # Best Finish
-            best1 = s1['best_finish'] if s1['best_finish'] is not None else 0
-            best2 = s2['best_finish'] if s2['best_finish'] is not None else 0
             def best_delta(a, b):
                 if a == 0 or b == 0:
                     return None
@@ -226,15 +133,17 @@ def team_points_analysis():
                 diff = b - a
                 sign = "+" if diff > 0 else ""
                 return f"{sign}{diff}"
-            col2.metric(f"Best Finish ({s1['label']})", f"P{best1}" if best1 else "-", delta=best_delta(best1, best2))
-            col2.metric(f"Best Finish ({s2['label']})", f"P{best2}" if best2 else "-", delta=best_delta(best2, best1))
-            # Avg Points
-            avg1 = round(s1["avg_points"], 2)
-            avg2 = round(s2["avg_points"], 2)
-            avg_delta1 = percent_delta(avg1, avg2)
-            avg_delta2 = percent_delta(avg2, avg1)
-            col3.metric(f"Avg Points per race ({s1['label']})", avg1, delta=avg_delta1)
-            col3.metric(f"Avg Points per race ({s2['label']})", avg2, delta=avg_delta2)
+            for i, s in enumerate(stats):
+                ref = analysis.reference_stats(stats, i)
+                # Total Points
+                col1.metric(f"Total Points ({s['label']})", s["total_points"], delta=percent_delta(s["total_points"], ref["total_points"]))
+                # Best Finish
+                best = s['best_finish'] if s['best_finish'] is not None else 0
+                ref_best = ref['best_finish'] if ref['best_finish'] is not None else 0
+                col2.metric(f"Best Finish ({s['label']})", f"P{best}" if best else "-", delta=best_delta(best, ref_best))
+                # Avg Points
+                avg = round(s["avg_points"], 2)
+                col3.metric(f"Avg Points per race ({s['label']})", avg, delta=percent_delta(avg, round(ref["avg_points"], 2)))
         else:
             for s in stats:
                 col1, col2, col3 = st.columns(3)
@@ -246,76 +155,22 @@ def team_points_analysis():
     else:
         st.info("No team points data for the selected team(s) in the selected timeframe.")
 
+@profiling.traced
 def pitstop_analysis():
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    DATA_DIR = os.path.join(BASE_DIR, "archive")
-    pit_stops = pd.read_csv(os.path.join(DATA_DIR, "pit_stops.csv"))
-    results = pd.read_csv(os.path.join(DATA_DIR, "results.csv"))
-    constructors = pd.read_csv(os.path.join(DATA_DIR, "constructors.csv"))
-    selected_team = st.session_state.get("selected_team_name")
-    compare_team = st.session_state.get("compare_team_name") if st.session_state.get("enable_team_comparison") else None
-    teams_to_plot = [selected_team]
-    if compare_team:
-        teams_to_plot.append(compare_team)
-    races = pd.read_csv(os.path.join(DATA_DIR, "races.csv"))
-    if st.session_state.get("custom_timeframe_selected", False):
-        start_date, end_date = st.session_state["custom_timeframe"]
-        races["date"] = pd.to_datetime(races["date"])
-        races_in_timeframe = races[(races["date"] >= pd.to_datetime(start_date)) & (races["date"] <= pd.to_datetime(end_date))]
-    else:
-        season = st.session_state.get("race_season", 2024)
-        races_in_timeframe = races[races["year"] == season]
-    race_ids = races_in_timeframe["raceId"].unique()
-    pit_data = []
-    for team_name in teams_to_plot:
-        if not team_name:
-            continue
-        team_row = constructors[constructors['name'] == team_name]
-        if team_row.empty:
-            continue
-        team_id = team_row.iloc[0]['constructorId']
-        team_results = results[(results["constructorId"].astype(int) == int(team_id)) & (results["raceId"].isin(race_ids))]
-        driver_ids = team_results["driverId"].unique()
-        team_pits = pit_stops[(pit_stops["raceId"].isin(race_ids)) & (pit_stops["driverId"].isin(driver_ids))].copy()
-        if team_pits.empty:
-            continue
-        team_pits["team"] = team_name
-        team_pits = team_pits[pd.to_numeric(team_pits["milliseconds"], errors="coerce").notna()]
-        team_pits = team_pits[team_pits["milliseconds"] > 0]
-        team_pits = team_pits[(team_pits["milliseconds"] >= 0) & (team_pits["milliseconds"] <= 40000)]
-        team_pits["duration_s"] = team_pits["milliseconds"] / 1000.0
-        pit_data.append(team_pits)
-    if pit_data:
-        pit_df = pd.concat(pit_data)
-        filtered_df = pit_df[(pit_df["duration_s"] >= 0) & (pit_df["duration_s"] <= 40)]
-        filtered_df["team"] = pd.Categorical(filtered_df["team"], categories=sorted(filtered_df["team"].unique()), ordered=True)
-        fig = px.box(
-            filtered_df,
-            x="team",
-            y="duration_s",
-            points="outliers",
-            color="team",
-            labels={"duration_s": "Pit Stop Duration (s)", "team": "Team"},
-            title="Pit Stop Time Distribution (Box Plot)",
-            category_orders={"team": sorted(filtered_df["team"].unique())}
-        )
-        fig.update_traces(jitter=0.3, marker=dict(size=6, opacity=0.7))
-        fig.update_layout(yaxis=dict(title="Pit Stop Duration (s)", range=[0, 40]))
-        st.plotly_chart(fig, use_container_width=True)
+    teams_to_plot = get_teams_to_plot()
+    team_names = {t["id"]: t["team"] for t in teams_to_plot if t["id"] is not None}
+    with profiling.span("filter"):
+        races_in_timeframe = analysis.selected_races(st.session_state)
+
+    team_stops, pit_stats = analysis.team_pit_stops(team_names, races_in_timeframe, season=analysis.selected_season(st.session_state))
+    if not team_stops.empty:
+        fig = figures.cached("team_pit_stops", team_names, races_in_timeframe, None,
+                             lambda: analysis.team_pit_stops_figure(team_stops))
+        with profiling.span("render"):
+            st.plotly_chart(fig, use_container_width=True)
 
         # --- Pit Stop Stats Widgets ---
-        pit_stats = []
-        for team_name in sorted(filtered_df["team"].unique()):
-            team_pits = filtered_df[filtered_df["team"] == team_name]["duration_s"]
-            if not team_pits.empty:
-                pit_stats.append({
-                    "label": team_name,
-                    "mean": team_pits.mean(),
-                    "best": team_pits.min(),
-                    "worst": team_pits.max()
-                })
-        if len(pit_stats) == 2:
-            s1, s2 = pit_stats[0], pit_stats[1]
+        if len(pit_stats) >= 2:
             col1, col2, col3 = st.columns(3)
             def mean_delta(a, b):
                 if a is None or b is None:
@@ -341,15 +196,13 @@ def pitstop_analysis():
                     return "="
                 sign = "-" if diff < 0 else "+"
                 return f"{sign}{abs(diff):.3f} s"
-            # Mean
-            col1.metric(f"Mean Pit Stop ({s1['label']})", f"{s1['mean']:.3f} s", delta=mean_delta(s1['mean'], s2['mean']))
-            col1.metric(f"Mean Pit Stop ({s2['label']})", f"{s2['mean']:.3f} s", delta=mean_delta(s2['mean'], s1['mean']))
-            # Best 
-            col2.metric(f"Best Pit Stop ({s1['label']})", f"{s1['best']:.3f} s", delta=best_delta(s1['best'], s2['best']))
-            col2.metric(f"Best Pit Stop ({s2['label']})", f"{s2['best']:.3f} s", delta=best_delta(s2['best'], s1['best']))
-            # Worst
-            col3.metric(f"Worst Pit Stop ({s1['label']})", f"{s1['worst']:.3f} s", delta=worst_delta(s1['worst'], s2['worst']))
-            col3.metric(f"Worst Pit Stop ({s2['label']})", f"{s2['worst']:.3f} s", delta=worst_delta(s2['worst'], s1['worst']))
+            # Deltas are against the selected team, which is compared with the first other team
+            selected = next((i for i, s in enumerate(pit_stats) if s["label"] == teams_to_plot[0]["team"]), 0)
+            for i, s in enumerate(pit_stats):
+                ref = pit_stats[selected] if i != selected else pit_stats[1 if selected == 0 else 0]
+                col1.metric(f"Mean Pit Stop ({s['label']})", f"{s['mean']:.3f} s", delta=mean_delta(s['mean'], ref['mean']))
+                col2.metric(f"Best Pit Stop ({s['label']})", f"{s['best']:.3f} s", delta=best_delta(s['best'], ref['best']))
+                col3.metric(f"Worst Pit Stop ({s['label']})", f"{s['worst']:.3f} s", delta=worst_delta(s['worst'], ref['worst']))
         else:
             for s in pit_stats:
                 col1, col2, col3 = st.columns(3)
@@ -359,6 +212,47 @@ def pitstop_analysis():
     else:
         st.info("No pit stop data for the selected team(s) in the selected timeframe.")
 
+def build_charts(labels, colors, season):
+    '''
+    Every chart of the page for a selection, built into the figure cache
+    without rendering. Runs on the prefetch threads, so no Streamlit calls.
+    '''
+    races = data.race_calendar().races_in(season=season)
+    series, stats = analysis.team_points(labels, races, season=season)
+    if len(stats) > 0:
+        figures.cached("team_points", labels, races, colors,
+                       lambda: analysis.team_points_figure(series, colors))
+    team_names = {team_id: name for team_id, name in labels.items() if team_id is not None}
+    team_stops, _ = analysis.team_pit_stops(team_names, races, season=season)
+    if not team_stops.empty:
+        figures.cached("team_pit_stops", team_names, races, None,
+                       lambda: analysis.team_pit_stops_figure(team_stops))
+
+def schedule_prefetch():
+    '''
+    Build the charts of the seasons either side of this one that the team
+    raced in, in the background. Runs once per selection, and only for a
+    whole season; a new selection cancels whatever is still queued.
+    '''
+    season = analysis.selected_season(st.session_state)
+    teams_to_plot = get_teams_to_plot()
+    labels = {t["id"]: t["team"] for t in teams_to_plot}
+    colors = {t["team"]: t["color"] for t in teams_to_plot}
+    selection = (season, tuple(labels.items()), tuple(colors.items()))
+    if st.session_state.get("prefetch_selection") == selection:
+        return
+    st.session_state["prefetch_selection"] = selection
+    team_id = teams_to_plot[0]["id"] if teams_to_plot else None
+    if season is None or team_id is None:
+        prefetch.cancel()
+        return
+
+    facts = data.constructor_race_facts()
+    seasons = sorted(set(facts.loc[facts["constructorId"] == team_id, "year"].tolist()))
+    earlier = [year for year in seasons if year < season]
+    later = [year for year in seasons if year > season]
+    prefetch.schedule([functools.partial(build_charts, labels, colors, adjacent) for adjacent in earlier[-1:] + later[:1]])
+
 def show_team_page(team_name):
     st.subheader(f"Analysis for {team_name}")
 
@@ -376,15 +270,11 @@ def show_team_page(team_name):
     </div>
     """
 
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    DATA_DIR = os.path.join(BASE_DIR, "archive")
-    constructors = pd.read_csv(os.path.join(DATA_DIR, "constructors.csv"))
-
     # Find nationality for the team
     nationality = ""
-    row = constructors[constructors['name'] == team_name]
-    if not row.empty:
-        nationality = row.iloc[0]['nationality']
+    team = data.constructor_index().record_by_name(team_name)
+    if team:
+        nationality = team['nationality']
     col1.markdown(style.format(label="Team Name", value=team_name), unsafe_allow_html=True)
     col2.markdown(style.format(label="Nationality", value=nationality), unsafe_allow_html=True)
 
@@ -392,4 +282,5 @@ def show_team_page(team_name):
     show_filters_team()
     team_points_analysis()
 
-    pitstop_analysis()
\ No newline at end of file
+    pitstop_analysis()
+    schedule_prefetch()
@@ -0,0 +1,181 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import train_model
+
+RACE_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+
+# Finishing distributions are learned from these archive seasons plus the 2025 results so far
+HISTORY_YEARS = (2023, 2024)
+CURRENT_WEIGHT = 3
+PRIOR_WEIGHT = 1
+
+SHARD_SIZE = 20_000
+LOOKUP_RESOLUTION = 1 << 16
+
+
+def current_standings():
+    """
+    Points and wins for every 2025 driver, the drivers taking part in the
+    remaining races, and how many races and sprints are left.
+    """
+    races_df, results_df, sprint_results_df, drivers_df, rounds_completed = train_model.load_2025_season()
+    points = pd.concat([results_df, sprint_results_df])[["driverId", "points"]].groupby("driverId")["points"].sum()
+    wins = results_df[results_df["positionOrder"] == 1].groupby("driverId").size()
+    standings = drivers_df.set_index("driverId")
+    standings["points"] = points.reindex(standings.index, fill_value=0)
+    standings["wins"] = wins.reindex(standings.index, fill_value=0)
+
+    # The latest line-up is assumed to race for the rest of the season
+    last_race = results_df["raceId"].max()
+    standings["active"] = standings.index.isin(results_df.loc[results_df["raceId"] == last_race, "driverId"])
+
+    sprints_completed = sprint_results_df["raceId"].nunique()
+    _, ingest = train_model.app_modules()
+    return (
+        standings.reset_index(),
+        ingest.SEASON_2025_ROUNDS - rounds_completed,
+        ingest.SEASON_2025_SPRINTS - sprints_completed,
+        results_df
+    )
+
+
+def finishing_distributions(standings, results_2025):
+    """
+    Probability of each active driver finishing in each position, as a
+    (drivers, positions) array. Combines archive finishing positions from
+    HISTORY_YEARS, 2025 finishing positions weighted by CURRENT_WEIGHT,
+    and a uniform prior so drivers with no history can still score.
+    """
+    active = standings[standings["active"]]
+    grid_size = len(active)
+    counts = np.full((grid_size, grid_size), PRIOR_WEIGHT, dtype=float)
+
+    # History comes from the app's shared, typed tables rather than the raw CSVs
+    data, _ = train_model.app_modules()
+    races = data.load_table("races")
+    results = data.load_table("results")
+    race_ids = races.loc[races["year"].isin(HISTORY_YEARS), "raceId"]
+    history = results[results["raceId"].isin(race_ids)]
+
+    # 2025 drivers carry their archive ids, so their history is looked up directly
+    for row, driver_id in enumerate(active["driverId"]):
+        past = history.loc[history["driverId"] == driver_id, "positionOrder"]
+        current = results_2025.loc[results_2025["driverId"] == driver_id, "positionOrder"]
+        # Positions beyond the current grid count as last place
+        counts[row] += np.bincount(past.clip(upper=grid_size).to_numpy(dtype=np.int64) - 1, minlength=grid_size)
+        counts[row] += CURRENT_WEIGHT * np.bincount(current.clip(upper=grid_size).to_numpy() - 1, minlength=grid_size)
+
+    return counts / counts.sum(axis=1, keepdims=True)
+
+
+def position_lookup(distributions):
+    """
+    Table mapping a uniform integer draw below LOOKUP_RESOLUTION to a
+    0-based finishing position for every driver, so sampling a position
+    is a single gather instead of a search.
+    """
+    cdf = np.cumsum(distributions, axis=1)
+    cdf /= cdf[:, -1:]
+    draws = (np.arange(LOOKUP_RESOLUTION) + 0.5) / LOOKUP_RESOLUTION
+    return np.stack([np.searchsorted(driver_cdf, draws) for driver_cdf in cdf]).astype(np.int32)
+
+
+def sample_finishing_orders(rng, lookup, n_seasons, n_races):
+    """
+    Driver indexes in finishing order for every simulated race, shaped
+    (n_seasons, n_races, drivers). Each driver draws a position from
+    their own distribution; clashes are broken at random.
+    """
+    n_drivers = len(lookup)
+    draws = rng.integers(0, LOOKUP_RESOLUTION, (n_seasons, n_races, n_drivers), dtype=np.int32)
+    positions = lookup[np.arange(n_drivers), draws]
+    # Random low bits order drivers who drew the same position
+    keys = (positions << 16) | rng.integers(0, 1 << 16, positions.shape, dtype=np.int32)
+    return keys.argsort(axis=-1)
+
+
+def points_for(orders, points_table):
+    """Points each driver scores over all races in finishing orders from sample_finishing_orders."""
+    table = np.zeros(orders.shape[-1], dtype=np.float32)
+    table[:len(points_table)] = points_table
+    points = np.empty(orders.shape, dtype=np.float32)
+    np.put_along_axis(points, orders, table, axis=-1)
+    return points.sum(axis=1)
+
+
+def wins_for(orders):
+    """Races each driver wins in finishing orders from sample_finishing_orders."""
+    winners = orders[..., 0]
+    return (winners[..., None] == np.arange(orders.shape[-1])).sum(axis=1)
+
+
+def simulate_shard(points, wins, active, distributions, races_left, sprints_left, n_seasons, seed):
+    """
+    Simulates n_seasons completions of the season and returns how many
+    titles each driver won.
+    """
+    rng = np.random.default_rng(seed)
+    lookup = position_lookup(distributions)
+    totals = np.tile(points.astype(np.float64), (n_seasons, 1))
+    win_counts = np.tile(wins.astype(np.float64), (n_seasons, 1))
+
+    if races_left:
+        race_orders = sample_finishing_orders(rng, lookup, n_seasons, races_left)
+        totals[:, active] += points_for(race_orders, RACE_POINTS)
+        win_counts[:, active] += wins_for(race_orders)
+    if sprints_left:
+        sprint_orders = sample_finishing_orders(rng, lookup, n_seasons, sprints_left)
+        totals[:, active] += points_for(sprint_orders, SPRINT_POINTS)
+
+    # Ties on points go to the driver with more wins
+    champions = (totals + win_counts * 1e-3).argmax(axis=1)
+    return np.bincount(champions, minlength=len(points))
+
+
+def simulate_season(n_seasons=100_000, seed=0, workers=None):
+    """
+    Title probability for every 2025 driver over n_seasons simulated
+    completions of the season. Work is split into fixed-size shards with
+    their own seeds, so the result for a given seed does not depend on
+    the number of workers.
+    """
+    standings, races_left, sprints_left, results_2025 = current_standings()
+    distributions = finishing_distributions(standings, results_2025)
+    points = standings["points"].to_numpy()
+    wins = standings["wins"].to_numpy()
+    active = np.flatnonzero(standings["active"].to_numpy())
+
+    shard_sizes = [SHARD_SIZE] * (n_seasons // SHARD_SIZE)
+    if n_seasons % SHARD_SIZE:
+        shard_sizes.append(n_seasons % SHARD_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    args = [(points, wins, active, distributions, races_left, sprints_left, size, shard_seed)
+            for size, shard_seed in zip(shard_sizes, seeds)]
+
+    if workers == 1 or len(args) == 1:
+        titles = [simulate_shard(*shard_args) for shard_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            titles = list(pool.map(simulate_shard, *zip(*args)))
+
+    standings["titles"] = np.sum(titles, axis=0)
+    standings["probability"] = standings["titles"] / n_seasons
+    return standings.sort_values(["probability", "points"], ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the rest of the 2025 season")
+    parser.add_argument("--seasons", type=int, default=100_000, help="number of simulated seasons")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (defaults to all cores)")
+    args = parser.parse_args()
+
+    result = simulate_season(args.seasons, args.seed, args.workers)
+    print(result[["Driver", "Team", "points", "wins", "probability"]].head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
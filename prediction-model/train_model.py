@@ -1,82 +1,298 @@
 import pandas as pd
+import hashlib
+import json
 import os
+import sys
+import joblib
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "archive")
+SEASON_2025_DIR = os.path.join(BASE_DIR, "F1_2025_Dataset")
+PAGES_DIR = os.path.join(BASE_DIR, "pages")
+MODEL_DIR = os.path.join(BASE_DIR, "prediction-model", "models")
+MODEL_PATH = os.path.join(MODEL_DIR, "champion_model.joblib")
 
-races = pd.read_csv(os.path.join(DATA_DIR, "races.csv"))
-results = pd.read_csv(os.path.join(DATA_DIR, "results.csv"))
-driver_standings = pd.read_csv(os.path.join(DATA_DIR, "driver_standings.csv"))
-drivers = pd.read_csv(os.path.join(DATA_DIR, "drivers.csv"))
+ARCHIVE_TABLES = ["races", "results", "sprint_results", "driver_standings"]
+SEASON_2025_FILES = {
+    "race_results": "Formula1_2025Season_RaceResults.csv",
+    "sprint_results": "Formula1_2025Season_SprintResults.csv"
+}
 
-drivers['full_name'] = drivers['forename'] + ' ' + drivers['surname']
+MODEL_PARAMS = {"n_estimators": 100, "random_state": 42}
 
-def calculate_features(year, cutoff_race_id, results_df):
+
+def load_archive():
+    """Reads the archive tables the model is trained on."""
+    return {name: pd.read_csv(os.path.join(DATA_DIR, f"{name}.csv")) for name in ARCHIVE_TABLES}
+
+
+def race_results(races_df, results_df, sprint_results_df=None):
     """
-    Calculates features for all drivers in a given season up to a given cutoff race.
-    Features:
-    - Total points
-    - Total wins
-    - Total podiums
-    - Average finishing position
-    - Total races
+    Results collapsed to one row per (year, round, driverId), in calendar
+    order, with the points, wins and podiums behind the standings features.
+    Sprint points are added to the weekend's points when sprint results
+    are given.
     """
+    season_results = results_df[['raceId', 'driverId', 'points', 'positionOrder']]
+    if sprint_results_df is not None:
+        sprints = sprint_results_df[['raceId', 'driverId', 'points']].assign(positionOrder=float('nan'))
+        season_results = pd.concat([season_results, sprints], ignore_index=True)
+    season_results = season_results.merge(
+        races_df[['raceId', 'year', 'round']], on='raceId'
+    )
+    position = pd.to_numeric(season_results['positionOrder'], errors='coerce')
+    season_results = season_results.assign(
+        wins=(position == 1).astype(int),
+        podiums=(position <= 3).astype(int)
+    )
 
-    results_df['positionOrder'] = pd.to_numeric(results_df['positionOrder'], errors='coerce')
-    
-    driver_features = results_df[results_df['raceId'] <= cutoff_race_id].groupby('driverId').agg(
-        total_points=('points', 'sum'),
-        total_wins=('positionOrder', lambda x: (x == 1).sum()),
-        total_podiums=('positionOrder', lambda x: (x <= 3).sum()),
-        avg_finishing_position=('positionOrder', 'mean'),
-        total_races=('raceId', 'nunique')
-    ).reset_index()
+    # Collapse shared drives so each driver has one row per race
+    return season_results.groupby(['year', 'round', 'raceId', 'driverId'], as_index=False).agg(
+        points=('points', 'sum'),
+        wins=('wins', 'sum'),
+        podiums=('podiums', 'sum')
+    ).sort_values(['year', 'round'], kind='stable')
 
-    driver_features['avg_points'] = driver_features['total_points'] / driver_features['total_races']
 
-    return driver_features
+SNAPSHOT_FEATURES = [
+    'total_points',
+    'total_wins',
+    'total_podiums',
+    'form',
+    'standings_position',
+    'gap_to_leader',
+    'races_remaining'
+]
 
+FORM_WINDOW = 3
 
-def create_training_set(races, results, driver_standings):
-    """Creates the training set for the model from past seasons"""
-    
-    data = []
-    for year in range(2018, 2024):  # Using data from 2018 to 2023 for training
-        # --- FIX 4: Correct column name from race_id to raceId ---
-        cutoff_race_id = races[races['year'] == year]['raceId'].max()
-        features_for_year = calculate_features(year, cutoff_race_id, results)
 
-        # find champion for the year
-        final_race_id = races[races['year'] == year]['raceId'].max()
-        champion_id = driver_standings[driver_standings['raceId'] == final_race_id].iloc[0]['driverId']
+class StandingsSnapshots:
+    """
+    Every driver's standing after every round of a range of seasons, as a
+    float32 feature matrix with one row per (year, round, driverId) and
+    one column per SNAPSHOT_FEATURES entry, plus the champion label.
+    """
 
-        features_for_year['champion'] = (features_for_year['driverId'] == champion_id).astype(int)
+    def __init__(self, races_df, results_df, sprint_results_df, driver_standings_df, first_year=2018, last_year=2024):
+        per_race = race_results(races_df, results_df, sprint_results_df)
+        per_race = per_race[per_race['year'].between(first_year, last_year)]
 
-        data.append(features_for_year)
+        # Every driver who raced in a season gets a row after every round of it
+        season_races = races_df.loc[races_df['year'].between(first_year, last_year), ['year', 'round', 'raceId']]
+        season_drivers = per_race[['year', 'driverId']].drop_duplicates()
+        grid = season_races.merge(season_drivers, on='year').merge(
+            per_race[['raceId', 'driverId', 'points', 'wins', 'podiums']], on=['raceId', 'driverId'], how='left'
+        ).fillna({'points': 0, 'wins': 0, 'podiums': 0})
+        grid = grid.sort_values(['year', 'driverId', 'round'], kind='stable').reset_index(drop=True)
 
-    return pd.concat(data, ignore_index=True)
+        by_driver = grid.groupby(['year', 'driverId'])
+        running = by_driver[['points', 'wins', 'podiums']].cumsum()
+        grid['total_points'] = running['points']
+        grid['total_wins'] = running['wins']
+        grid['total_podiums'] = running['podiums']
 
-def model_training():
-    """Trains the model on the training set."""
-    training_data = create_training_set(races, results, driver_standings)
+        # Rolling form is the average points over the last FORM_WINDOW rounds
+        rounds_so_far = by_driver.cumcount() + 1
+        window_start = grid.groupby(['year', 'driverId'])['total_points'].shift(FORM_WINDOW).fillna(0)
+        grid['form'] = (grid['total_points'] - window_start) / rounds_so_far.clip(upper=FORM_WINDOW)
+
+        by_round = grid.groupby(['year', 'round'])['total_points']
+        grid['standings_position'] = by_round.rank(method='min', ascending=False)
+        grid['gap_to_leader'] = by_round.transform('max') - grid['total_points']
+        grid['races_remaining'] = grid.groupby('year')['round'].transform('max') - grid['round']
 
-    features = [
-        'total_points',
-        'total_wins',
-        'total_podiums',
-        'avg_finishing_position',
-        'total_races'
-    ]
+        final_races = races_df.sort_values('round').drop_duplicates('year', keep='last')[['year', 'raceId']]
+        leaders = driver_standings_df[driver_standings_df['position'] == 1][['raceId', 'driverId']]
+        champions = final_races.merge(leaders, on='raceId').set_index('year')['driverId']
+
+        self.years = grid['year'].to_numpy(dtype='int16')
+        self.rounds = grid['round'].to_numpy(dtype='int8')
+        self.driver_ids = grid['driverId'].to_numpy(dtype='int32')
+        self.features = grid[SNAPSHOT_FEATURES].to_numpy(dtype='float32')
+        self.champion = (grid['driverId'] == grid['year'].map(champions)).to_numpy(dtype='int8')
+
+    def __len__(self):
+        return len(self.features)
+
+    def as_of(self, year, cutoff_round):
+        """Feature rows and driver ids for a season as it stood after the given round."""
+        mask = (self.years == year) & (self.rounds == cutoff_round)
+        return self.features[mask], self.driver_ids[mask]
+
+
+def model_training():
+    """Trains the model on race-by-race standings snapshots."""
+    archive = load_archive()
+    snapshots = StandingsSnapshots(
+        archive["races"], archive["results"], archive["sprint_results"], archive["driver_standings"]
+    )
 
-    X = training_data[features]
-    y = training_data['champion']
+    X = snapshots.features
+    y = snapshots.champion
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model = RandomForestClassifier(**MODEL_PARAMS)
     model.fit(X, y)
 
     return model
 
+
+def source_paths():
+    """Every file the model or its 2025 predictions are built from."""
+    paths = [os.path.join(DATA_DIR, f"{name}.csv") for name in ARCHIVE_TABLES]
+    paths += [os.path.join(SEASON_2025_DIR, file_name) for file_name in SEASON_2025_FILES.values()]
+    return paths
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# Last fingerprint and the file signatures it was hashed from
+_fingerprint = {}
+
+
+def data_fingerprint():
+    """
+    Hash of the training data, feature list and model settings. A saved
+    model is only reused while this matches the one it was saved with.
+    The files are only hashed again when their mtime or size changes.
+    """
+    signatures = [_signature(path) for path in source_paths()]
+    if _fingerprint.get("signatures") == signatures:
+        return _fingerprint["value"]
+
+    digest = hashlib.sha256()
+    for path in source_paths():
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    digest.update(json.dumps({
+        "features": SNAPSHOT_FEATURES,
+        "form_window": FORM_WINDOW,
+        "params": MODEL_PARAMS,
+        "sklearn": sklearn.__version__
+    }, sort_keys=True).encode())
+    _fingerprint.update(signatures=signatures, value=digest.hexdigest())
+    return _fingerprint["value"]
+
+
+def save_model(model, fingerprint, path=MODEL_PATH):
+    """Writes the model with its fingerprint and feature list."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    artifact = {"model": model, "fingerprint": fingerprint, "features": SNAPSHOT_FEATURES}
+    tmp_path = f"{path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_saved_model(path=MODEL_PATH):
+    """
+    Returns the saved model if it was trained on the current data,
+    otherwise None.
+    """
+    try:
+        artifact = joblib.load(path)
+    except Exception:
+        return None
+    if artifact.get("fingerprint") == data_fingerprint() and artifact.get("features") == SNAPSHOT_FEATURES:
+        return artifact["model"]
+    return None
+
+
+def load_model(path=MODEL_PATH):
+    """
+    Returns the saved model if it was trained on the current data,
+    otherwise retrains and saves a new one.
+    """
+    model = load_saved_model(path)
+    if model is None:
+        model = model_training()
+        save_model(model, data_fingerprint(), path)
+    return model
+
+
+def app_modules():
+    """
+    The app's data and ingest modules, which the 2025 season and the
+    simulator's history are read through.
+    """
+    if PAGES_DIR not in sys.path:
+        sys.path.append(PAGES_DIR)
+    import data
+    import ingest
+    return data, ingest
+
+
+def load_2025_season():
+    """
+    The 2025 results as the app sees them: the archive tables plus the rounds
+    normalized by ingest.py, with archive driver ids. Rounds that have not
+    been raced yet get placeholder race ids that no result refers to.
+    """
+    data, ingest = app_modules()
+
+    # Only rounds that are new or changed since the last ingest are processed
+    ingest.ingest()
+    races = data.load_table("races")
+    races = races[races["year"] == 2025]
+    race_ids = dict(zip(races["round"].astype(int), races["raceId"].astype(int)))
+    rounds = range(1, ingest.SEASON_2025_ROUNDS + 1)
+    races_df = pd.DataFrame({"raceId": [race_ids.get(r, -r) for r in rounds], "year": 2025, "round": rounds})
+
+    results = data.load_table("results")
+    results = results[results["raceId"].isin(races["raceId"])]
+    sprints = data.load_table("sprint_results")
+    sprints = sprints[sprints["raceId"].isin(races["raceId"])]
+    results_df = pd.DataFrame({
+        "raceId": results["raceId"].to_numpy(dtype="int64"),
+        "driverId": results["driverId"].to_numpy(dtype="int64"),
+        "points": results["points"].to_numpy(dtype="float64"),
+        "positionOrder": results["positionOrder"].to_numpy(dtype="int64")
+    })
+    sprint_results_df = pd.DataFrame({
+        "raceId": sprints["raceId"].to_numpy(dtype="int64"),
+        "driverId": sprints["driverId"].to_numpy(dtype="int64"),
+        "points": sprints["points"].to_numpy(dtype="float64")
+    })
+
+    # Each driver's team is the one they raced for most recently
+    latest = results.merge(races[["raceId", "round"]], on="raceId").sort_values("round")
+    teams = latest.drop_duplicates("driverId", keep="last").set_index("driverId")["constructorId"]
+    driver_ids = pd.unique(pd.concat([results_df["driverId"], sprint_results_df["driverId"]]))
+    driver_index = data.driver_index()
+    constructor_index = data.constructor_index()
+    drivers_df = pd.DataFrame({
+        "driverId": driver_ids,
+        "Driver": [driver_index.name_of(driver_id) for driver_id in driver_ids],
+        "Team": [constructor_index.name_of(teams[driver_id]) if driver_id in teams.index else None for driver_id in driver_ids]
+    })
+    rounds_completed = int(races.loc[races["raceId"].isin(results["raceId"]), "round"].max()) if len(results) else 0
+    return races_df, results_df, sprint_results_df, drivers_df, rounds_completed
+
+
+def predict_2025_champion(model):
+    """Championship probability for every 2025 driver after the latest completed round."""
+    races_df, results_df, sprint_results_df, drivers_df, rounds_completed = load_2025_season()
+    no_standings = pd.DataFrame(columns=["raceId", "driverId", "position"])
+    snapshots = StandingsSnapshots(races_df, results_df, sprint_results_df, no_standings, first_year=2025, last_year=2025)
+    features, driver_ids = snapshots.as_of(2025, rounds_completed)
+    if len(features) == 0:
+        # No round has been completed yet, so there is nothing to predict from
+        return pd.DataFrame(columns=SNAPSHOT_FEATURES + ["driverId", "probability", "Driver", "Team", "rounds_completed"])
+
+    predictions = pd.DataFrame(features, columns=SNAPSHOT_FEATURES)
+    predictions["driverId"] = driver_ids
+    predictions["probability"] = model.predict_proba(features)[:, list(model.classes_).index(1)]
+    predictions = predictions.merge(drivers_df, on="driverId")
+    predictions["rounds_completed"] = rounds_completed
+    return predictions.sort_values("probability", ascending=False).reset_index(drop=True)
+
+
 if __name__ == "__main__":
-    trained_model = model_training()
-    print(f"Model created: {trained_model}")
\ No newline at end of file
+    trained_model = load_model()
+    print(f"Model loaded: {trained_model}")
+    print(predict_2025_champion(trained_model)[["Driver", "Team", "total_points", "probability"]].head(5))
\ No newline at end of file